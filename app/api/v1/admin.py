@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+import time
+from datetime import date
 
-from sqlalchemy import select, and_
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from watchfiles import awatch
 
-from app.api.v1.clients import get_master_service, get_client_service, get_appointment_service, get_service_service
-from app.database.models import Master as MasterModel, Service as ServiceModel, Appointment as AppointmentModel, Client as ClientModel
-from app.schemas.appointment import AppointmentCreate, AppointmentResponse
+from app.core.cache import catalog_cache, client_cache
+from app.core.pool import pool_status
+from app.core.replica import get_write_db, sticky_primary
+from app.api.v1.clients import (
+    get_master_service, get_client_reader, get_appointment_service, get_service_service, client_rows,
+    get_report_service, get_report_reader, get_bulk_service, get_bulk_reader,
+    get_partition_service
+)
+from app.schemas.bulk import CsvEntityName, ImportResult
+from app.schemas.client import ClientResponse
+from app.schemas.partition import AppointmentPartition, PartitionMaintenance
+from app.schemas.report import ReportGroupBy, ReportRow, RebuildResult
+from app.schemas.appointment import AppointmentCreate, AppointmentResponse, ScheduleTemplate, ScheduleResult
 
 from app.schemas.master import MasterResponse, MasterCreate, MasterWithServices
 
@@ -24,8 +37,10 @@ router = APIRouter(prefix="/admin", tags=["admin"])
     response_model=MasterResponse,
     summary="Создать нового мастера"
 )
-async def create_master(master_data: MasterCreate, service = Depends(get_master_service)):
-    return await service.create_master(master_data)
+async def create_master(master_data: MasterCreate, request: Request, service = Depends(get_master_service)):
+    master = await service.create_master(master_data)
+    await sticky_primary.mark(request)
+    return master
 
 
 @router.post(
@@ -34,8 +49,10 @@ async def create_master(master_data: MasterCreate, service = Depends(get_master_
     response_model=ServiceResponse,
     summary="Создать новую услугу"
 )
-async def create_service(service_data: ServiceCreate, service = Depends(get_service_service)):
-    return await service.create_service(service_data)
+async def create_service(service_data: ServiceCreate, request: Request, service = Depends(get_service_service)):
+    created = await service.create_service(service_data)
+    await sticky_primary.mark(request)
+    return created
 
 
 @router.post(
@@ -44,8 +61,30 @@ async def create_service(service_data: ServiceCreate, service = Depends(get_serv
     response_model=AppointmentResponse,
     summary="Создать новую запись"
 )
-async def create_appointment(appointment_data: AppointmentCreate, service = Depends(get_appointment_service)):
-    return await service.create_slot(appointment_data)
+async def create_appointment(
+        appointment_data: AppointmentCreate,
+        request: Request,
+        service = Depends(get_appointment_service)
+):
+    appointment = await service.create_slot(appointment_data)
+    await sticky_primary.mark(request)
+    return appointment
+
+
+@router.post(
+    "/appointments/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ScheduleResult,
+    summary="Создать записи по шаблону расписания"
+)
+async def create_appointments_schedule(
+        template: ScheduleTemplate,
+        request: Request,
+        service = Depends(get_appointment_service)
+):
+    result = await service.create_schedule(template)
+    await sticky_primary.mark(request)
+    return result
 
 
 @router.post(
@@ -54,8 +93,15 @@ async def create_appointment(appointment_data: AppointmentCreate, service = Depe
     response_model=MasterWithServices,
     summary="Добавить услугу к мастеру"
 )
-async def add_service_to_master(master_id: int, service_id: int, service = Depends(get_master_service)):
-    return await service.add_service_to_master(master_id, service_id)
+async def add_service_to_master(
+        master_id: int,
+        service_id: int,
+        request: Request,
+        service = Depends(get_master_service)
+):
+    master = await service.add_service_to_master(master_id, service_id)
+    await sticky_primary.mark(request)
+    return master
 
 
 @router.delete(
@@ -64,5 +110,150 @@ async def add_service_to_master(master_id: int, service_id: int, service = Depen
     response_model=AppointmentResponse,
     summary="Удалить услугу"
 )
-async def delete_appointment(appointment_id: int, service = Depends(get_appointment_service)):
-    return await service.delete_appointment(appointment_id)
\ No newline at end of file
+async def delete_appointment(appointment_id: int, request: Request, service = Depends(get_appointment_service)):
+    appointment = await service.delete_appointment(appointment_id)
+    await sticky_primary.mark(request)
+    return appointment
+
+
+@router.get(
+    "/clients/search",
+    response_model=list[ClientResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Поиск клиентов по имени, фамилии или телефону"
+)
+async def search_clients(
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(20, ge=1, le=100),
+        service = Depends(get_client_reader)
+):
+    return client_rows.response(await service.search_clients(q, limit))
+
+
+@router.get(
+    "/reports/appointments",
+    response_model=list[ReportRow],
+    status_code=status.HTTP_200_OK,
+    summary="Выручка и загрузка по дням, мастерам или услугам"
+)
+async def get_appointments_report(
+        date_from: date,
+        date_to: date,
+        group_by: ReportGroupBy = "day",
+        master_id: int | None = None,
+        service_id: int | None = None,
+        service = Depends(get_report_reader)
+):
+    return await service.get_report(group_by, date_from, date_to, master_id, service_id)
+
+
+@router.post(
+    "/reports/rebuild",
+    response_model=RebuildResult,
+    status_code=status.HTTP_200_OK,
+    summary="Пересчитать агрегаты по записям"
+)
+async def rebuild_appointments_report(
+        date_from: date | None = None,
+        date_to: date | None = None,
+        service = Depends(get_report_service)
+):
+    return await service.rebuild(date_from, date_to)
+
+
+@router.get(
+    "/partitions",
+    response_model=list[AppointmentPartition],
+    status_code=status.HTTP_200_OK,
+    summary="Партиции записей, текущие и архивные"
+)
+async def get_partitions(service = Depends(get_partition_service)):
+    return await service.get_partitions()
+
+
+@router.post(
+    "/partitions/maintain",
+    response_model=PartitionMaintenance,
+    status_code=status.HTTP_200_OK,
+    summary="Создать будущие партиции записей и перенести старые в архив"
+)
+async def maintain_partitions(service = Depends(get_partition_service)):
+    return await service.maintain(config.APPOINTMENT_PARTITIONS_AHEAD, config.APPOINTMENT_RETENTION_MONTHS)
+
+
+@router.post(
+    "/import/{entity}",
+    response_model=ImportResult,
+    status_code=status.HTTP_200_OK,
+    summary="Импорт клиентов, мастеров, услуг или записей из CSV"
+)
+async def import_csv(entity: CsvEntityName, request: Request, service = Depends(get_bulk_service)):
+    result = await service.import_csv(entity, request.stream())
+    await sticky_primary.mark(request)
+    return result
+
+
+@router.get(
+    "/export/{entity}",
+    status_code=status.HTTP_200_OK,
+    summary="Выгрузка клиентов, мастеров, услуг или записей в CSV"
+)
+async def export_csv(
+        entity: CsvEntityName,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        service = Depends(get_bulk_reader)
+):
+    return StreamingResponse(
+        service.export_csv(entity, date_from, date_to),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{entity}.csv"'}
+    )
+
+
+@router.get(
+    "/cache/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Статистика кэша каталога"
+)
+async def get_cache_stats():
+    return {cache.name: cache.stats() for cache in (catalog_cache, client_cache)}
+
+
+@router.get(
+    "/health/db",
+    status_code=status.HTTP_200_OK,
+    summary="Состояние подключения и пула БД"
+)
+async def get_db_health(db: AsyncSession = Depends(get_write_db)):
+    if config.REPOSITORY_BACKEND == "memory":
+        return {"database": "memory"}
+    health = {"driver": config.DB_DRIVER}
+    started = time.perf_counter()
+    try:
+        await db.execute(text("SELECT 1"))
+    except (DBAPIError, OSError) as e:
+        health |= {"database": "unavailable", "error": str(e), "pool": pool_status(config.engine.pool)}
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=health)
+    health |= {
+        "database": "ok",
+        "ping_seconds": time.perf_counter() - started,
+        "pool": pool_status(config.engine.pool),
+    }
+    if config.replica_engine is not None:
+        health["replica"] = await _replica_health()
+    return health
+
+
+async def _replica_health() -> dict:
+    started = time.perf_counter()
+    try:
+        async with config.session(replica=True) as db:
+            await db.execute(text("SELECT 1"))
+    except (DBAPIError, OSError) as e:
+        return {"database": "unavailable", "error": str(e), "pool": pool_status(config.replica_engine.pool)}
+    return {
+        "database": "ok",
+        "ping_seconds": time.perf_counter() - started,
+        "pool": pool_status(config.replica_engine.pool),
+    }
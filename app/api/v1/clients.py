@@ -1,52 +1,117 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+import asyncio
+from datetime import date, time, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from watchfiles import awatch
 
+from app.api.v1.conditional import not_modified
+from app.api.v1.serialization import RowSerializer
+from app.api.v1.streaming import set_next_cursor, sse_response
+from app.core.cache import catalog_cache, client_cache
+from app.core.events import event_broker
+from app.core.replica import get_read_db, get_write_db, sticky_primary
+from app.core.versions import resource_versions, master_schedule
 from app.database.connect import config
 from app.repositories.appointment import AppointmentRepository
+from app.repositories.bulk import BulkRepository
+from app.repositories.partition import PartitionRepository
+from app.repositories.base import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.repositories.client import ClientRepository
 from app.repositories.master import MasterRepository
+from app.repositories.memory import MEMORY_REPOSITORIES, memory_store
 from app.repositories.service import ServiceRepository
-from app.schemas.client import ClientCreate, ClientResponse
-from app.schemas.master import MasterResponse, MasterWithServices, MasterWithAppointments, MasterId
+from app.repositories.report import ReportRepository
+from app.schemas.client import ClientCreate, ClientResponse, ClientTgIds
+from app.schemas.master import MasterResponse, MasterWithServices, MasterWithAppointments, MasterId, CatalogSnapshot
 from app.schemas.service import ServiceResponse, ServiceId
-from app.schemas.appointment import AppointmentResponse, AppointmentId
+from app.schemas.appointment import AppointmentResponse, AppointmentId, FreeSlot, MasterSchedule, BookingResponse, BookingScope
 from app.database.models import Client as ClientModel
 from app.database.models import Master as MasterModel
 from app.database.models import Service as ServiceModel
 from app.database.models import Appointment as AppointmentModel
+from app.database.models import AppointmentDailyStats as AppointmentDailyStatsModel
 from app.services.appointment import AppointmentService
+from app.services.bulk import BulkService
+from app.services.partition import PartitionService
 from app.services.client import ClientService
 from app.services.master import MasterService
 from app.services.service import ServiceService
+from app.services.report import ReportService
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
+client_rows = RowSerializer(ClientResponse)
+appointment_rows = RowSerializer(AppointmentResponse)
+booking_rows = RowSerializer(BookingResponse)
+
+
+def make_repository(repository: type, model: type, db: AsyncSession | None):
+    if config.REPOSITORY_BACKEND == "memory":
+        return MEMORY_REPOSITORIES[repository](model, memory_store)
+    return repository(model, db)
+
+
+def require_database():
+    if config.REPOSITORY_BACKEND == "memory":
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Недоступно при REPOSITORY_BACKEND=memory"
+        )
+
+
+def get_client_service(db: AsyncSession = Depends(get_write_db)):
+    repo = make_repository(ClientRepository, ClientModel, db)
+    return ClientService(repo, client_cache)
+
+
+def get_client_reader(db: AsyncSession = Depends(get_read_db)):
+    return get_client_service(db)
+
+
+def get_master_service(db: AsyncSession = Depends(get_write_db)):
+    service_repo = make_repository(ServiceRepository, ServiceModel, db)
+    master_repo = make_repository(MasterRepository, MasterModel, db)
+    return MasterService(master_repo, service_repo, catalog_cache, resource_versions)
+
+
+def get_service_service(db: AsyncSession = Depends(get_write_db)):
+    service_repo = make_repository(ServiceRepository, ServiceModel, db)
+    return ServiceService(service_repo, catalog_cache, resource_versions)
 
-def get_client_service(db: AsyncSession = Depends(config.get_db)):
-    repo = ClientRepository(ClientModel, db)
-    return ClientService(repo)
 
+def get_appointment_service(db: AsyncSession = Depends(get_write_db)):
+    appt_repo = make_repository(AppointmentRepository, AppointmentModel, db)
+    client_repo = make_repository(ClientRepository, ClientModel, db)
+    service_repo = make_repository(ServiceRepository, ServiceModel, db)
+    master_repo = make_repository(MasterRepository, MasterModel, db)
+    return AppointmentService(client_repo, master_repo, service_repo, appt_repo, resource_versions, event_broker)
 
-def get_master_service(db: AsyncSession = Depends(config.get_db)):
-    service_repo = ServiceRepository(ServiceModel, db)
-    master_repo = MasterRepository(MasterModel, db)
-    return MasterService(master_repo, service_repo)
 
+def get_appointment_reader(db: AsyncSession = Depends(get_read_db)):
+    return get_appointment_service(db)
 
-def get_service_service(db: AsyncSession = Depends(config.get_db)):
-    service_repo = ServiceRepository(ServiceModel, db)
-    return ServiceService(service_repo)
 
+def get_report_service(db: AsyncSession = Depends(get_write_db)):
+    require_database()
+    return ReportService(ReportRepository(AppointmentDailyStatsModel, db))
 
-def get_appointment_service(db: AsyncSession = Depends(config.get_db)):
-    appt_repo = AppointmentRepository(AppointmentModel, db)
-    client_repo = ClientRepository(ClientModel, db)
-    service_repo = ServiceRepository(ServiceModel, db)
-    master_repo = MasterRepository(MasterModel, db)
-    return AppointmentService(client_repo, master_repo, service_repo, appt_repo)
+
+def get_report_reader(db: AsyncSession = Depends(get_read_db)):
+    return get_report_service(db)
+
+
+def get_bulk_service(db: AsyncSession = Depends(get_write_db)):
+    require_database()
+    return BulkService(BulkRepository(db), client_cache, catalog_cache, resource_versions)
+
+
+def get_bulk_reader(db: AsyncSession = Depends(get_read_db)):
+    return get_bulk_service(db)
+
+
+def get_partition_service(db: AsyncSession = Depends(get_write_db)):
+    require_database()
+    return PartitionService(PartitionRepository(AppointmentModel, db))
 
 
 @router.post(
@@ -55,8 +120,10 @@ def get_appointment_service(db: AsyncSession = Depends(config.get_db)):
     status_code=status.HTTP_201_CREATED,
     summary="Создать нового клиента"
 )
-async def create_new_client(client_data: ClientCreate, service = Depends(get_client_service)):
-    return await service.create_client(client_data)
+async def create_new_client(client_data: ClientCreate, request: Request, service = Depends(get_client_service)):
+    client = await service.create_client(client_data)
+    await sticky_primary.mark(request, client_id=client.id, tg_id=client.tg_id)
+    return client
 
 
 @router.get(
@@ -65,8 +132,16 @@ async def create_new_client(client_data: ClientCreate, service = Depends(get_cli
     status_code=status.HTTP_200_OK,
     summary="Получить всех клиентов"
 )
-async def get_all_clients(service = Depends(get_client_service)):
-    return await service.get_all_clients()
+async def get_all_clients(
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        stream: bool = False,
+        service = Depends(get_client_reader)
+):
+    if stream:
+        return client_rows.ndjson_response(service.stream_clients())
+    rows, next_cursor = await service.get_all_clients(cursor, limit)
+    return client_rows.response(rows, next_cursor)
 
 
 @router.get(
@@ -75,18 +150,90 @@ async def get_all_clients(service = Depends(get_client_service)):
     status_code=status.HTTP_200_OK,
     summary="Получить клиента по tg ID"
 )
-async def get_client_by_tg_id(tg_id: str, service = Depends(get_client_service)):
+async def get_client_by_tg_id(tg_id: str, service = Depends(get_client_reader)):
     return await service.get_client_by_tg_id(tg_id)
 
 
+@router.post(
+    "/by_tg_ids",
+    response_model=list[ClientResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Получить клиентов по списку tg ID"
+)
+async def get_clients_by_tg_ids(data: ClientTgIds, service = Depends(get_client_reader)):
+    return await service.get_clients_by_tg_ids(data.tg_ids)
+
+
 @router.get(
     "/services",
     response_model=list[ServiceResponse],
     status_code=status.HTTP_200_OK,
     summary="Получить все услуги"
 )
-async def get_all_services(service = Depends(get_service_service)):
-    return await service.get_all_services()
+async def get_all_services(
+        request: Request,
+        response: Response,
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        service = Depends(get_service_service)
+):
+    if cached := await not_modified(request, response, "services"):
+        return cached
+    services, next_cursor = await service.get_all_services(cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return services
+
+
+@router.get(
+    "/services/{service_id}/availability",
+    response_model=list[FreeSlot],
+    status_code=status.HTTP_200_OK,
+    summary="Получить свободные окна для услуги"
+)
+async def get_service_availability(
+        service_id: int,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        master_id: int | None = None,
+        day_start: time | None = None,
+        day_end: time | None = None,
+        service = Depends(get_appointment_reader)
+):
+    date_from = date_from or date.today()
+    return await service.get_free_slots(
+        service_id,
+        date_from,
+        date_to or date_from + timedelta(days=30),
+        day_start,
+        day_end,
+        master_id
+    )
+
+
+@router.get(
+    "/services/{service_id}/availability/earliest",
+    response_model=FreeSlot,
+    status_code=status.HTTP_200_OK,
+    summary="Получить ближайшее свободное окно для услуги"
+)
+async def get_service_earliest_slot(
+        service_id: int,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        master_id: int | None = None,
+        day_start: time | None = None,
+        day_end: time | None = None,
+        service = Depends(get_appointment_reader)
+):
+    date_from = date_from or date.today()
+    return await service.get_earliest_free_slot(
+        service_id,
+        date_from,
+        date_to or date_from + timedelta(days=30),
+        day_start,
+        day_end,
+        master_id
+    )
 
 
 @router.get(
@@ -95,8 +242,60 @@ async def get_all_services(service = Depends(get_service_service)):
     status_code=status.HTTP_200_OK,
     summary="Получить все записи"
 )
-async def get_all_appointments(service=Depends(get_appointment_service)):
-    return await service.get_all_appointments()
+async def get_all_appointments(
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        master_id: int | None = None,
+        client_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        free: bool | None = None,
+        stream: bool = False,
+        service=Depends(get_appointment_reader)
+):
+    if stream:
+        rows = service.stream_appointments(master_id, client_id, date_from, date_to, free)
+        return appointment_rows.ndjson_response(rows)
+    rows, next_cursor = await service.get_all_appointments(
+        cursor, limit, master_id, client_id, date_from, date_to, free
+    )
+    return appointment_rows.response(rows, next_cursor)
+
+
+@router.get(
+    "/appointments/events",
+    status_code=status.HTTP_200_OK,
+    summary="Подписаться на изменения слотов (SSE)"
+)
+async def subscribe_appointment_events(
+        request: Request,
+        master_id: int | None = None,
+        day: date | None = Query(None, alias="date")
+):
+    return sse_response(request, event_broker.subscribe(master_id, day), config.EVENT_KEEPALIVE_SECONDS)
+
+
+@router.websocket("/appointments/events/ws")
+async def appointment_events_ws(websocket: WebSocket, master_id: int | None = None, day: date | None = Query(None, alias="date")):
+    await websocket.accept()
+    subscription = event_broker.subscribe(master_id, day)
+
+    async def watch_disconnect():
+        try:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            subscription.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        while (payload := await subscription.get()) is not None:
+            await websocket.send_text(payload)
+        if not watcher.done():
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    finally:
+        watcher.cancel()
+        subscription.close()
 
 
 @router.post(
@@ -105,8 +304,27 @@ async def get_all_appointments(service=Depends(get_appointment_service)):
     status_code=status.HTTP_200_OK,
     summary="Записать клиента на услугу"
 )
-async def sign_up_client_on_appointment(client_id: int, appointment_id: int, service = Depends(get_appointment_service)):
-    return await service.book_slot(client_id, appointment_id)
+async def sign_up_client_on_appointment(
+        client_id: int,
+        appointment_id: int,
+        request: Request,
+        service = Depends(get_appointment_service)
+):
+    appointment = await service.book_slot(client_id, appointment_id)
+    await sticky_primary.mark(request)
+    return appointment
+
+
+@router.get(
+    "/catalog",
+    response_model=CatalogSnapshot,
+    status_code=status.HTTP_200_OK,
+    summary="Получить каталог мастеров и услуг с ценами"
+)
+async def get_catalog(request: Request, response: Response, service = Depends(get_master_service)):
+    if cached := await not_modified(request, response, "masters", "services"):
+        return cached
+    return await service.get_catalog()
 
 
 @router.get(
@@ -115,8 +333,18 @@ async def sign_up_client_on_appointment(client_id: int, appointment_id: int, ser
     status_code=status.HTTP_200_OK,
     summary="Получить всех мастеров"
 )
-async def get_all_masters(service = Depends(get_master_service)):
-    return await service.get_all_masters()
+async def get_all_masters(
+        request: Request,
+        response: Response,
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        service = Depends(get_master_service)
+):
+    if cached := await not_modified(request, response, "masters"):
+        return cached
+    masters, next_cursor = await service.get_all_masters(cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return masters
 
 
 @router.get(
@@ -125,7 +353,9 @@ async def get_all_masters(service = Depends(get_master_service)):
     status_code=status.HTTP_200_OK,
     summary="Получить мастера по ID"
 )
-async def get_master_by_id(id: int, service = Depends(get_master_service)):
+async def get_master_by_id(id: int, request: Request, response: Response, service = Depends(get_master_service)):
+    if cached := await not_modified(request, response, "masters"):
+        return cached
     return await service.get_master_by_id(id)
 
 
@@ -135,7 +365,9 @@ async def get_master_by_id(id: int, service = Depends(get_master_service)):
     status_code=status.HTTP_200_OK,
     summary="Получить все сервисы мастера"
 )
-async def get_master_with_services(master_id: int, service = Depends(get_master_service)):
+async def get_master_with_services(master_id: int, request: Request, response: Response, service = Depends(get_master_service)):
+    if cached := await not_modified(request, response, "masters", "services"):
+        return cached
     return await service.get_master_with_services(master_id)
 
 
@@ -145,16 +377,39 @@ async def get_master_with_services(master_id: int, service = Depends(get_master_
     status_code=status.HTTP_200_OK,
     summary="Получить все записи мастера"
 )
-async def get_master_with_appointments(master_id: int, service = Depends(get_master_service)):
+async def get_master_with_appointments(master_id: int, request: Request, response: Response, service = Depends(get_master_service)):
+    if cached := await not_modified(request, response, "masters", master_schedule(master_id)):
+        return cached
     return await service.get_master_with_appointments(master_id)
 
 
+@router.get(
+    "/masters/{master_id}/schedule",
+    response_model=MasterSchedule,
+    status_code=status.HTTP_200_OK,
+    summary="Получить расписание мастера за период"
+)
+async def get_master_schedule(
+        master_id: int,
+        request: Request,
+        response: Response,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        service = Depends(get_appointment_service)
+):
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=6)
+    if cached := await not_modified(request, response, master_schedule(master_id), variant=f"{date_from}:{date_to}"):
+        return cached
+    return await service.get_master_schedule(master_id, date_from, date_to)
+
+
 @router.post(
     "/appointment_id",
     status_code=status.HTTP_200_OK,
     summary="Получить ID по данным записи"
 )
-async def get_id_by_appointment_data(appointment_data: AppointmentId, service = Depends(get_appointment_service)):
+async def get_id_by_appointment_data(appointment_data: AppointmentId, service = Depends(get_appointment_reader)):
     return await service.get_id_by_data(appointment_data)
 
 
@@ -181,7 +436,7 @@ async def get_id_by_master_data(master_data: MasterId, service = Depends(get_mas
     status_code=status.HTTP_200_OK,
     summary="Получить ID по данным клиента"
 )
-async def get_id_by_tg_id(tg_id: str, service = Depends(get_client_service)):
+async def get_id_by_tg_id(tg_id: str, service = Depends(get_client_reader)):
     return await service.get_client_id_by_tg_id(tg_id)
 
 
@@ -191,15 +446,22 @@ async def get_id_by_tg_id(tg_id: str, service = Depends(get_client_service)):
     status_code=status.HTTP_200_OK,
     summary="Отписать клиента от услуги"
 )
-async def unlink_client_from_appointment(client_id: int, appointment_id: int, service = Depends(get_appointment_service)):
-    return await service.unlink_client_from_appointment(client_id, appointment_id)
+async def unlink_client_from_appointment(
+        client_id: int,
+        appointment_id: int,
+        request: Request,
+        service = Depends(get_appointment_service)
+):
+    appointment = await service.unlink_client_from_appointment(client_id, appointment_id)
+    await sticky_primary.mark(request)
+    return appointment
 
 
 @router.get(
     "/{client_id}/appointments",
-    response_model=list[AppointmentResponse],
+    response_model=list[BookingResponse],
     status_code=status.HTTP_200_OK,
     summary="Получить все записи клиента"
 )
-async def get_clients_appointments(client_id: int, service = Depends(get_appointment_service)):
-    return await service.get_clients_appointments(client_id)
\ No newline at end of file
+async def get_clients_appointments(client_id: int, scope: BookingScope = "all", service = Depends(get_appointment_reader)):
+    return booking_rows.response(await service.get_clients_appointments(client_id, scope))
\ No newline at end of file
@@ -0,0 +1,46 @@
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+from app.core.versions import resource_versions
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+def _not_modified_since(header: str, last_modified) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and last_modified <= since
+
+
+async def not_modified(request: Request, response: Response, *resources: str, variant: str = "") -> Response | None:
+    digest = hashlib.sha1(request.url.path.encode())
+    last_modified = None
+    for resource in resources:
+        token, modified_at = await resource_versions.get(resource)
+        digest.update(f"|{resource}={token}".encode())
+        last_modified = modified_at if last_modified is None else max(last_modified, modified_at)
+    digest.update(f"?{request.url.query}#{variant}".encode())
+    etag = f'"{digest.hexdigest()[:32]}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        matched = if_modified_since is not None and _not_modified_since(if_modified_since, last_modified)
+    if matched:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
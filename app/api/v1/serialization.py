@@ -0,0 +1,32 @@
+from typing import AsyncIterator, Iterable, Mapping
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from app.api.v1.streaming import ndjson_response, set_next_cursor
+
+
+class RowSerializer:
+    def __init__(self, schema: type[BaseModel]):
+        row_type = TypedDict(
+            f"{schema.__name__}Row",
+            {name: field.annotation for name, field in schema.model_fields.items()}
+        )
+        self.row_adapter = TypeAdapter(row_type)
+        self.list_adapter = TypeAdapter(list[row_type])
+
+    def dump_json(self, rows: Iterable[Mapping]) -> bytes:
+        return self.list_adapter.dump_json([dict(row) for row in rows])
+
+    def encode_row(self, row: Mapping) -> bytes:
+        return self.row_adapter.dump_json(dict(row))
+
+    def response(self, rows: Iterable[Mapping], next_cursor: str | None = None) -> Response:
+        response = Response(content=self.dump_json(rows), media_type="application/json")
+        set_next_cursor(response, next_cursor)
+        return response
+
+    def ndjson_response(self, rows: AsyncIterator[Mapping]) -> StreamingResponse:
+        return ndjson_response(rows, self.encode_row)
@@ -0,0 +1,53 @@
+import asyncio
+from typing import AsyncIterator, Callable
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.events import Subscription
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_BATCH_SIZE = 500
+
+
+def set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def ndjson_response(rows: AsyncIterator, encode: Callable[[object], bytes]) -> StreamingResponse:
+    async def body():
+        batch = []
+        async for row in rows:
+            batch.append(encode(row))
+            if len(batch) >= NDJSON_BATCH_SIZE:
+                yield b"\n".join(batch) + b"\n"
+                batch.clear()
+        if batch:
+            yield b"\n".join(batch) + b"\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def sse_response(request: Request, subscription: Subscription, keepalive: float) -> StreamingResponse:
+    async def body():
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), keepalive)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+                if payload is None:
+                    return
+                yield f"data: {payload}\n\n".encode()
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import sys
+from datetime import date
+
+from app.database.connect import config
+from app.database.models import Appointment as AppointmentModel
+from app.database.models import AppointmentDailyStats as AppointmentDailyStatsModel
+from app.core.cache import catalog_cache, client_cache
+from app.core.versions import resource_versions
+from app.repositories.bulk import BulkRepository, ENTITIES
+from app.repositories.partition import PartitionRepository
+from app.repositories.report import ReportRepository
+from app.services.bulk import BulkService
+from app.services.partition import PartitionService
+
+CLI_CHUNK_SIZE = 1 << 20
+
+
+async def rebuild_stats(args: argparse.Namespace) -> None:
+    try:
+        async with config.session() as db:
+            rows = await ReportRepository(AppointmentDailyStatsModel, db).rebuild(args.date_from, args.date_to)
+    finally:
+        await config.dispose_engine()
+    print("rows", rows)
+
+
+async def maintain_partitions(args: argparse.Namespace) -> None:
+    try:
+        async with config.session() as db:
+            service = PartitionService(PartitionRepository(AppointmentModel, db))
+            result = await service.maintain(args.ahead, args.retention)
+    finally:
+        await config.dispose_engine()
+    print("created", result.created)
+    print("archived", result.archived)
+
+
+async def read_file(path: str):
+    with open(path, "rb") as file:
+        while chunk := await asyncio.to_thread(file.read, CLI_CHUNK_SIZE):
+            yield chunk
+
+
+async def import_csv(args: argparse.Namespace) -> None:
+    try:
+        async with config.session() as db:
+            service = BulkService(BulkRepository(db), client_cache, catalog_cache, resource_versions)
+            result = await service.import_csv(args.entity, read_file(args.file))
+    finally:
+        await config.dispose_engine()
+    print(result.model_dump_json(indent=2))
+
+
+async def export_csv(args: argparse.Namespace) -> None:
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with config.session(replica=True) as db:
+            service = BulkService(BulkRepository(db), client_cache, catalog_cache, resource_versions)
+            async for chunk in service.export_csv(args.entity, args.date_from, args.date_to):
+                output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        await config.dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Служебные команды CRM")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser("rebuild-stats", help="Пересчитать агрегаты по записям")
+    rebuild_parser.add_argument("--date-from", type=date.fromisoformat)
+    rebuild_parser.add_argument("--date-to", type=date.fromisoformat)
+    rebuild_parser.set_defaults(handler=rebuild_stats)
+
+    partitions_parser = subparsers.add_parser(
+        "maintain-partitions", help="Создать будущие партиции записей и перенести старые в архив"
+    )
+    partitions_parser.add_argument("--ahead", type=int, default=config.APPOINTMENT_PARTITIONS_AHEAD)
+    partitions_parser.add_argument("--retention", type=int, default=config.APPOINTMENT_RETENTION_MONTHS)
+    partitions_parser.set_defaults(handler=maintain_partitions)
+
+    import_parser = subparsers.add_parser("import", help="Загрузить CSV через COPY")
+    import_parser.add_argument("entity", choices=list(ENTITIES))
+    import_parser.add_argument("file")
+    import_parser.set_defaults(handler=import_csv)
+
+    export_parser = subparsers.add_parser("export", help="Выгрузить таблицу в CSV через COPY")
+    export_parser.add_argument("entity", choices=list(ENTITIES))
+    export_parser.add_argument("-o", "--output")
+    export_parser.add_argument("--date-from", type=date.fromisoformat)
+    export_parser.add_argument("--date-to", type=date.fromisoformat)
+    export_parser.set_defaults(handler=export_csv)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
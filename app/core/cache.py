@@ -0,0 +1,149 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from importlib import import_module
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from app.database.connect import config
+
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._data if key.startswith(prefix)]:
+            del self._data[key]
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+def make_backend(spec: str, max_size: int) -> CacheBackend:
+    if spec == "memory":
+        return MemoryBackend(max_size)
+    module_name, class_name = spec.split(":", 1)
+    return getattr(import_module(module_name), class_name)(max_size)
+
+
+class Cache:
+    def __init__(self, name: str, backend: CacheBackend, ttl: float, negative_ttl: float | None = None):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        key = f"{self.name}:{key}"
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        await self.backend.set(key, value, self._ttl_for(value))
+        return value
+
+    async def get_many_or_load(
+            self,
+            prefix: str,
+            ids: Iterable[Hashable],
+            loader: Callable[[list], Awaitable[dict]]
+    ) -> dict:
+        found, missing = {}, []
+        for id in dict.fromkeys(ids):
+            value = await self.backend.get(f"{self.name}:{prefix}{id}")
+            if value is MISSING:
+                missing.append(id)
+            else:
+                found[id] = value
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            loaded = await loader(missing)
+            for id in missing:
+                value = loaded.get(id)
+                await self.backend.set(f"{self.name}:{prefix}{id}", value, self._ttl_for(value))
+                found[id] = value
+        return found
+
+    def _ttl_for(self, value: Any) -> float:
+        return self.negative_ttl if value is None else self.ttl
+
+    async def discard(self, *keys: str) -> None:
+        for key in keys:
+            await self.backend.delete(f"{self.name}:{key}")
+
+    async def invalidate(self, *prefixes: str) -> None:
+        for prefix in prefixes:
+            await self.backend.delete_prefix(f"{self.name}:{prefix}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": self.backend.size(),
+        }
+
+
+catalog_cache = Cache(
+    "catalog",
+    make_backend(config.CACHE_BACKEND, config.CATALOG_CACHE_SIZE),
+    config.CATALOG_CACHE_TTL
+)
+
+client_cache = Cache(
+    "clients",
+    make_backend(config.CACHE_BACKEND, config.CLIENT_CACHE_SIZE),
+    config.CLIENT_CACHE_TTL,
+    config.CLIENT_CACHE_NEGATIVE_TTL
+)
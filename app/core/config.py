@@ -1,29 +1,139 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
 import os
 from dotenv import load_dotenv
 
+from app.core.pool import InstrumentedQueuePool
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     def __init__(self):
         load_dotenv()
+        self.DB_DRIVER = os.getenv('DB_DRIVER', 'psycopg')
+        if self.DB_DRIVER not in ('psycopg', 'asyncpg'):
+            raise ValueError(f"Unsupported DB_DRIVER: {self.DB_DRIVER}")
+        self.REPOSITORY_BACKEND = os.getenv('REPOSITORY_BACKEND', 'sql')
+        if self.REPOSITORY_BACKEND not in ('sql', 'memory'):
+            raise ValueError(f"Unsupported REPOSITORY_BACKEND: {self.REPOSITORY_BACKEND}")
+        self.DB_SSLMODE = os.getenv('DB_SSLMODE', 'require')
+        self.DB_ECHO = _env_bool('DB_ECHO', 'false')
+        self.DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+        self.DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+        self.DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+        self.DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '-1'))
+        self.DB_POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', 'false')
+        self.DB_NULLPOOL = _env_bool('DB_NULLPOOL', 'false')
+        statement_cache_size = os.getenv('DB_STATEMENT_CACHE_SIZE')
+        self.DB_STATEMENT_CACHE_SIZE = int(statement_cache_size) if statement_cache_size else None
         self.DATABASE_URL = (
-            f"postgresql+psycopg://"
+            f"postgresql+{self.DB_DRIVER}://"
             f"{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
             f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
         )
-        self.engine = create_async_engine(
-            self.DATABASE_URL,
-            echo=True,
-            future=True,
-            pool_size=5,
-            max_overflow=10,
-            connect_args={"sslmode": "require"},
-        )
-        self.AsyncSessionLocal = async_sessionmaker(
-            bind=self.engine,
-            class_=AsyncSession,
-            expire_on_commit=False
-        )
+        replica_host = os.getenv('DB_REPLICA_HOST')
+        self.REPLICA_DATABASE_URL = (
+            f"postgresql+{self.DB_DRIVER}://"
+            f"{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
+            f"@{replica_host}:{os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT'))}/{os.getenv('DB_NAME')}"
+        ) if replica_host else None
+        self.REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+        self.REPLICA_STICKY_SIZE = int(os.getenv('REPLICA_STICKY_SIZE', '100000'))
+        self.DB_POOL_WARMUP = int(os.getenv('DB_POOL_WARMUP', '0' if self.DB_NULLPOOL else str(self.DB_POOL_SIZE)))
+        self.engine = None
+        self.AsyncSessionLocal = None
+        self.replica_engine = None
+        self.ReplicaSessionLocal = None
+        self.CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+        self.CATALOG_CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', '1024'))
+        self.CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '300'))
+        self.CLIENT_CACHE_SIZE = int(os.getenv('CLIENT_CACHE_SIZE', '100000'))
+        self.CLIENT_CACHE_TTL = float(os.getenv('CLIENT_CACHE_TTL', '300'))
+        self.CLIENT_CACHE_NEGATIVE_TTL = float(os.getenv('CLIENT_CACHE_NEGATIVE_TTL', '5'))
+        self.RESOURCE_VERSIONS_SIZE = int(os.getenv('RESOURCE_VERSIONS_SIZE', '10000'))
+        self.SQL_STATEMENT_WARN_THRESHOLD = int(os.getenv('SQL_STATEMENT_WARN_THRESHOLD', '10'))
+        self.APPOINTMENT_PARTITIONS_AHEAD = int(os.getenv('APPOINTMENT_PARTITIONS_AHEAD', '3'))
+        self.APPOINTMENT_RETENTION_MONTHS = int(os.getenv('APPOINTMENT_RETENTION_MONTHS', '12'))
+        self.PARTITION_MAINTENANCE_INTERVAL = float(os.getenv('PARTITION_MAINTENANCE_INTERVAL', '3600'))
+        self.EVENT_BROKER = os.getenv('EVENT_BROKER', 'memory')
+        self.EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '1000'))
+        self.EVENT_KEEPALIVE_SECONDS = float(os.getenv('EVENT_KEEPALIVE_SECONDS', '15'))
+        self.DB_CONNECT_ARGS = {
+            "host": os.getenv('DB_HOST'),
+            "port": os.getenv('DB_PORT'),
+            "dbname": os.getenv('DB_NAME'),
+            "user": os.getenv('DB_USER'),
+            "password": os.getenv('DB_PASSWORD'),
+            "sslmode": self.DB_SSLMODE,
+        }
+
+    def init_engine(self):
+        if self.engine is None:
+            self.engine = create_async_engine(self.DATABASE_URL, **self.engine_options())
+            self.AsyncSessionLocal = async_sessionmaker(
+                bind=self.engine,
+                class_=AsyncSession,
+                expire_on_commit=False
+            )
+            self.ReplicaSessionLocal = self.AsyncSessionLocal
+        if self.REPLICA_DATABASE_URL and self.replica_engine is None:
+            self.replica_engine = create_async_engine(self.REPLICA_DATABASE_URL, **self.engine_options())
+            self.ReplicaSessionLocal = async_sessionmaker(
+                bind=self.replica_engine,
+                class_=AsyncSession,
+                expire_on_commit=False
+            )
+        return self.engine
+
+    async def dispose_engine(self) -> None:
+        if self.replica_engine is not None:
+            await self.replica_engine.dispose()
+            self.replica_engine = None
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+        self.AsyncSessionLocal = None
+        self.ReplicaSessionLocal = None
+
+    def connect_args(self) -> dict:
+        if self.DB_DRIVER == 'asyncpg':
+            args = {"ssl": self.DB_SSLMODE}
+            if self.DB_STATEMENT_CACHE_SIZE is not None:
+                args["statement_cache_size"] = self.DB_STATEMENT_CACHE_SIZE
+                args["prepared_statement_cache_size"] = self.DB_STATEMENT_CACHE_SIZE
+            return args
+        args = {"sslmode": self.DB_SSLMODE}
+        if self.DB_STATEMENT_CACHE_SIZE == 0:
+            args["prepare_threshold"] = None
+        return args
+
+    def engine_options(self) -> dict:
+        options = {
+            "echo": self.DB_ECHO,
+            "future": True,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+            "connect_args": self.connect_args(),
+        }
+        if self.DB_NULLPOOL:
+            options["poolclass"] = NullPool
+        else:
+            options |= {
+                "poolclass": InstrumentedQueuePool,
+                "pool_size": self.DB_POOL_SIZE,
+                "max_overflow": self.DB_MAX_OVERFLOW,
+                "pool_timeout": self.DB_POOL_TIMEOUT,
+                "pool_recycle": self.DB_POOL_RECYCLE,
+            }
+        return options
+
+    def session(self, replica: bool = False) -> AsyncSession:
+        if self.AsyncSessionLocal is None:
+            self.init_engine()
+        return self.ReplicaSessionLocal() if replica else self.AsyncSessionLocal()
 
     async def get_db(self):
-        async with self.AsyncSessionLocal() as session:
-            yield session
\ No newline at end of file
+        async with self.session() as session:
+            yield session
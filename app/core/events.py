@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import date
+from importlib import import_module
+
+from app.database.connect import config
+from app.schemas.event import SlotEvent
+
+logger = logging.getLogger(__name__)
+
+EVENT_CHANNEL = "appointment_events"
+RECONNECT_DELAY = 1.0
+
+
+class Subscription:
+    def __init__(self, broker: "EventBroker", master_id: int | None, day: date | None, queue_size: int):
+        self.broker = broker
+        self.master_id = master_id
+        self.day = day
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(queue_size)
+        self.closed = False
+
+    def matches(self, event: SlotEvent) -> bool:
+        return self.day is None or event.date_from <= self.day <= event.date_to
+
+    def put(self, payload: str) -> None:
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.close()
+
+    async def get(self) -> str | None:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.broker.unsubscribe(self)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventBroker(ABC):
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._subscribers: dict[int | None, set[Subscription]] = defaultdict(set)
+
+    @abstractmethod
+    async def publish(self, event: SlotEvent) -> None:
+        ...
+
+    def subscribe(self, master_id: int | None = None, day: date | None = None) -> Subscription:
+        subscription = Subscription(self, master_id, day, self.queue_size)
+        self._subscribers[master_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.master_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.master_id]
+
+    def dispatch(self, event: SlotEvent, payload: str) -> None:
+        for master_id in (event.master_id, None):
+            for subscription in list(self._subscribers.get(master_id, ())):
+                if subscription.matches(event):
+                    subscription.put(payload)
+
+    def subscribers(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    async def close(self) -> None:
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                subscription.close()
+
+
+class MemoryBroker(EventBroker):
+    async def publish(self, event: SlotEvent) -> None:
+        self.dispatch(event, event.model_dump_json())
+
+
+class PostgresBroker(EventBroker):
+    def __init__(self, queue_size: int = 1000, connect_args: dict | None = None):
+        super().__init__(queue_size)
+        self.connect_args = connect_args or config.DB_CONNECT_ARGS
+        self._publisher = None
+        self._lock = asyncio.Lock()
+        self._listener: asyncio.Task | None = None
+
+    async def _connect(self):
+        import psycopg
+
+        return await psycopg.AsyncConnection.connect(autocommit=True, **self.connect_args)
+
+    async def publish(self, event: SlotEvent) -> None:
+        import psycopg
+
+        async with self._lock:
+            try:
+                if self._publisher is None or self._publisher.closed:
+                    self._publisher = await self._connect()
+                await self._publisher.execute("SELECT pg_notify(%s, %s)", (EVENT_CHANNEL, event.model_dump_json()))
+            except (psycopg.Error, OSError) as e:
+                logger.warning("Slot event was not published: %s", e)
+                if self._publisher is not None:
+                    await self._publisher.close()
+                self._publisher = None
+
+    def subscribe(self, master_id: int | None = None, day: date | None = None) -> Subscription:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return super().subscribe(master_id, day)
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await self._connect() as connection:
+                    await connection.execute(f"LISTEN {EVENT_CHANNEL}")
+                    async for notify in connection.notifies():
+                        self.dispatch(SlotEvent.model_validate_json(notify.payload), notify.payload)
+            except (psycopg.Error, OSError) as e:
+                logger.warning("Slot event listener disconnected: %s", e)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._publisher is not None:
+            await self._publisher.close()
+            self._publisher = None
+        await super().close()
+
+
+def make_broker(spec: str, queue_size: int) -> EventBroker:
+    if spec == "memory":
+        return MemoryBroker(queue_size)
+    if spec == "postgres":
+        return PostgresBroker(queue_size)
+    module_name, class_name = spec.split(":", 1)
+    return getattr(import_module(module_name), class_name)(queue_size)
+
+
+event_broker = make_broker(config.EVENT_BROKER, config.EVENT_QUEUE_SIZE)
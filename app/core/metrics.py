@@ -0,0 +1,179 @@
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_time", "pool_wait")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+
+
+_current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def record_pool_wait(wait: float) -> None:
+    stats = _current_request.get()
+    if stats is not None:
+        stats.pool_wait += wait
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.flagged = 0
+
+
+class MetricsRegistry:
+    def __init__(self, statement_threshold: int):
+        self.statement_threshold = statement_threshold
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def observe(self, method: str, route: str, status_code: int, latency: float, stats: RequestStats) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.requests[status_code] = metrics.requests.get(status_code, 0) + 1
+        metrics.latency.observe(latency)
+        metrics.statements.observe(stats.statements)
+        metrics.db_time += stats.db_time
+        metrics.pool_wait += stats.pool_wait
+        if stats.statements > self.statement_threshold:
+            metrics.flagged += 1
+            logger.warning(
+                "%s %s executed %d SQL statements (threshold %d)",
+                method, route, stats.statements, self.statement_threshold
+            )
+
+    def render(self) -> list[str]:
+        lines = [
+            "# TYPE http_requests_total counter",
+            "# TYPE http_request_duration_seconds histogram",
+            "# TYPE http_request_sql_statements histogram",
+            "# TYPE http_request_db_seconds_total counter",
+            "# TYPE http_request_pool_wait_seconds_total counter",
+            "# TYPE http_requests_sql_flagged_total counter",
+        ]
+        for (method, route), metrics in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{route}"'
+            for status_code, count in sorted(metrics.requests.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status_code}"}} {count}')
+            lines += metrics.latency.render("http_request_duration_seconds", labels)
+            lines += metrics.statements.render("http_request_sql_statements", labels)
+            lines.append(f"http_request_db_seconds_total{{{labels}}} {metrics.db_time}")
+            lines.append(f"http_request_pool_wait_seconds_total{{{labels}}} {metrics.pool_wait}")
+            lines.append(f"http_requests_sql_flagged_total{{{labels}}} {metrics.flagged}")
+        return lines
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_request.reset(token)
+            route = scope.get("route")
+            self.registry.observe(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_code,
+                time.perf_counter() - started,
+                stats
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _record_statement(conn) -> None:
+    started = conn.info["query_started"].pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(conn)
+
+
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get("query_started"):
+        _record_statement(context.connection)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    if event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+def render_gauges(prefix: str, values: dict, labels: str = "") -> list[str]:
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, dict):
+            lines += render_gauges(f"{prefix}_{key}", value, labels)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"{prefix}_{key}{{{labels}}} {value}" if labels else f"{prefix}_{key} {value}")
+    return lines
@@ -0,0 +1,37 @@
+from datetime import date
+
+from fastapi import HTTPException, status
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Некорректный курсор"
+    )
+
+
+def encode_id_cursor(last_id: int) -> str:
+    return str(last_id)
+
+
+def decode_id_cursor(cursor: str | None) -> int | None:
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise _invalid_cursor()
+
+
+def encode_date_cursor(last_date: date, last_id: int) -> str:
+    return f"{last_date.isoformat()}.{last_id}"
+
+
+def decode_date_cursor(cursor: str | None) -> tuple[date, int] | None:
+    if cursor is None:
+        return None
+    try:
+        raw_date, raw_id = cursor.split(".", 1)
+        return date.fromisoformat(raw_date), int(raw_id)
+    except ValueError:
+        raise _invalid_cursor()
@@ -0,0 +1,56 @@
+from fastapi import Request
+
+from app.core.cache import CacheBackend, make_backend, MISSING
+from app.database.connect import config
+
+SESSION_HEADER = "X-Session-Id"
+STICKY_PARAMS = ("client_id", "tg_id")
+
+
+class StickyPrimary:
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _keys(self, request: Request, scope: dict) -> list[str]:
+        keys = []
+        session_id = request.headers.get(SESSION_HEADER)
+        if session_id:
+            keys.append(f"sticky:session:{session_id}")
+        for name in STICKY_PARAMS:
+            value = scope.get(name, request.path_params.get(name, request.query_params.get(name)))
+            if value is not None:
+                keys.append(f"sticky:{name}:{value}")
+        return keys
+
+    async def mark(self, request: Request, **scope) -> None:
+        if not config.REPLICA_DATABASE_URL:
+            return
+        for key in self._keys(request, scope):
+            await self.backend.set(key, True, self.ttl)
+
+    async def is_sticky(self, request: Request) -> bool:
+        for key in self._keys(request, {}):
+            if await self.backend.get(key) is not MISSING:
+                return True
+        return False
+
+
+sticky_primary = StickyPrimary(make_backend(config.CACHE_BACKEND, config.REPLICA_STICKY_SIZE), config.REPLICA_STICKY_SECONDS)
+
+
+async def get_write_db():
+    if config.REPOSITORY_BACKEND == "memory":
+        yield None
+        return
+    async with config.session() as session:
+        yield session
+
+
+async def get_read_db(request: Request):
+    if config.REPOSITORY_BACKEND == "memory":
+        yield None
+        return
+    replica = bool(config.REPLICA_DATABASE_URL) and not await sticky_primary.is_sticky(request)
+    async with config.session(replica) as session:
+        yield session
@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime, timezone
+
+from app.core.cache import CacheBackend, make_backend, MISSING
+from app.database.connect import config
+
+VERSION_TTL = config.CATALOG_CACHE_TTL
+
+
+class ResourceVersions:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    async def get(self, resource: str) -> tuple[str, datetime]:
+        key = f"version:{resource}"
+        version = await self.backend.get(key)
+        if version is MISSING:
+            version = (uuid.uuid4().hex, datetime.now(timezone.utc).replace(microsecond=0))
+            await self.backend.set(key, version, VERSION_TTL)
+        return version
+
+    async def bump(self, *resources: str) -> None:
+        modified_at = datetime.now(timezone.utc).replace(microsecond=0)
+        for resource in resources:
+            await self.backend.set(f"version:{resource}", (uuid.uuid4().hex, modified_at), VERSION_TTL)
+
+
+def master_schedule(master_id: int) -> str:
+    return f"master:{master_id}:appointments"
+
+
+resource_versions = ResourceVersions(make_backend(config.CACHE_BACKEND, config.RESOURCE_VERSIONS_SIZE))
@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Date, Time, Text, ForeignKey, Table, DateTime
+    Column, Integer, BigInteger, String, Date, Time, Text, ForeignKey, Table, DateTime, Index, CheckConstraint
 )
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy import text
@@ -16,6 +16,14 @@ masters_services = Table(
 
 class Client(Base):
     __tablename__ = "Client"
+    __table_args__ = (
+        Index(
+            "ix_Client_full_name_trgm",
+            text("lower(name || ' ' || coalesce(surname, '')) gin_trgm_ops"),
+            postgresql_using="gin"
+        ),
+        Index("ix_Client_phone_prefix", "phone", postgresql_ops={"phone": "varchar_pattern_ops"}),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(30), nullable=False)
@@ -53,9 +61,16 @@ class Service(Base):
 
 class Appointment(Base):
     __tablename__ = "Appointment"
-
-    id = Column(Integer, primary_key=True)
-    date = Column(Date, nullable=False)
+    __table_args__ = (
+        Index("ix_Appointment_master_id_date", "master_id", "date", "start_time"),
+        Index("ix_Appointment_client_id_date", "client_id", "date"),
+        Index("ix_Appointment_date_id", "date", "id"),
+        CheckConstraint("finish_time > start_time", name="ck_Appointment_time_order"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    date = Column(Date, primary_key=True)
     start_time = Column(Time, nullable=False)
     finish_time = Column(Time, nullable=False)
     price = Column(Integer, nullable=False)
@@ -69,6 +84,20 @@ class Appointment(Base):
     master_rel = relationship("Master", back_populates="appointments")
     service_rel = relationship("Service", back_populates="appointments")
 
+    __mapper_args__ = {"primary_key": [id]}
+
+
+class AppointmentDailyStats(Base):
+    __tablename__ = "Appointment_daily_stats"
+
+    date = Column(Date, primary_key=True)
+    master_id = Column(Integer, ForeignKey("Master.id", ondelete="CASCADE"), primary_key=True)
+    service_id = Column(Integer, ForeignKey("Service.id", ondelete="CASCADE"), primary_key=True)
+    booked_count = Column(Integer, nullable=False, server_default="0")
+    free_count = Column(Integer, nullable=False, server_default="0")
+    revenue = Column(BigInteger, nullable=False, server_default="0")
+    booked_minutes = Column(Integer, nullable=False, server_default="0")
+
 
 class Business(Base):
     __tablename__ = "Business"
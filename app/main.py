@@ -1,15 +1,104 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 import uvicorn
 from fastapi import FastAPI
-from app.api.v1.clients import router as clients_router
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from app.api.v1.clients import router as clients_router, get_master_service, get_service_service, get_partition_service
 from app.api.v1.admin import router as admin_router
+from app.api.v1.streaming import NEXT_CURSOR_HEADER
+from app.core.cache import catalog_cache, client_cache
+from app.core.events import event_broker
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, instrument_engine, render_gauges
+from app.core.pool import pool_status
+from app.database.connect import config
 
 from fastapi.middleware.cors import CORSMiddleware
 
+logger = logging.getLogger(__name__)
+
+
+async def _open_connection(engine):
+    connection = await engine.connect()
+    try:
+        await connection.execute(text("SELECT 1"))
+    except BaseException:
+        await connection.close()
+        raise
+    return connection
+
+
+async def warm_pool(engine) -> None:
+    results = await asyncio.gather(
+        *(_open_connection(engine) for _ in range(config.DB_POOL_WARMUP)),
+        return_exceptions=True
+    )
+    for result in results:
+        if not isinstance(result, BaseException):
+            await result.close()
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def warm_up() -> None:
+    for engine in (config.engine, config.replica_engine):
+        if engine is not None:
+            await warm_pool(engine)
+    async with config.session() as db:
+        await get_service_service(db).get_all_services()
+        await get_master_service(db).get_all_masters()
+        await get_master_service(db).get_catalog()
+
+
+async def maintain_partitions() -> None:
+    while True:
+        try:
+            async with config.session() as db:
+                result = await get_partition_service(db).maintain(
+                    config.APPOINTMENT_PARTITIONS_AHEAD, config.APPOINTMENT_RETENTION_MONTHS
+                )
+            if result.created or result.archived:
+                logger.info("Appointment partitions: %d created, %d archived", result.created, result.archived)
+        except Exception:
+            logger.exception("Partition maintenance failed")
+        await asyncio.sleep(config.PARTITION_MAINTENANCE_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.REPOSITORY_BACKEND == "memory":
+        yield
+        await event_broker.close()
+        return
+    config.init_engine()
+    for engine in (config.engine, config.replica_engine):
+        if engine is not None:
+            instrument_engine(engine)
+    try:
+        await warm_up()
+    except (DBAPIError, OSError) as e:
+        logger.warning("Warmup failed, continuing with a cold pool: %s", e)
+    maintenance = None
+    if config.PARTITION_MAINTENANCE_INTERVAL > 0:
+        maintenance = asyncio.create_task(maintain_partitions())
+    yield
+    if maintenance is not None:
+        maintenance.cancel()
+        with suppress(asyncio.CancelledError):
+            await maintenance
+    await event_broker.close()
+    await config.dispose_engine()
+
 
 app = FastAPI(
     title="Beauty Salon API",
     version="1.0.0",
-    description="API для салона красоты"
+    description="API для салона красоты",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -17,12 +106,29 @@ app.add_middleware(
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER]
 )
 
+metrics_registry = MetricsRegistry(config.SQL_STATEMENT_WARN_THRESHOLD)
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 app.include_router(clients_router, prefix="/api/v1")
 app.include_router(admin_router, prefix="/api/v1")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    lines = metrics_registry.render()
+    if config.engine is not None:
+        lines += render_gauges("db_pool", pool_status(config.engine.pool))
+    if config.replica_engine is not None:
+        lines += render_gauges("db_replica_pool", pool_status(config.replica_engine.pool))
+    for cache in (catalog_cache, client_cache):
+        lines += render_gauges("cache", cache.stats(), f'cache="{cache.name}"')
+    lines += render_gauges("events", {"subscribers": event_broker.subscribers()})
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run(app)
\ No newline at end of file
@@ -1,7 +1,12 @@
-from sqlalchemy import select, and_, Sequence
-from sqlalchemy.orm import selectinload
-from app.repositories.base import BaseRepository
+from datetime import date, datetime
+from typing import AsyncIterator
+
+from sqlalchemy import select, and_, Sequence, tuple_, update, true, insert, RowMapping
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from app.repositories.base import BaseRepository, DEFAULT_PAGE_SIZE, STREAM_CHUNK_SIZE
 from app.database.models import Appointment as AppointmentModel
+from app.database.models import Client as ClientModel, Master as MasterModel, Service as ServiceModel
 
 
 class AppointmentRepository(BaseRepository[AppointmentModel]):
@@ -16,11 +21,154 @@ class AppointmentRepository(BaseRepository[AppointmentModel]):
                 self.model.start_time < finish_time,
                 self.model.finish_time > start_time
             )
-        )
+        ).order_by(self.model.start_time).limit(1)
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
-    async def get_clients_appointments(self, client_id: int) -> Sequence[AppointmentModel]:
-        query = select(self.model).where(self.model.client_id == client_id)
+    async def get_client_bookings(self, columns: list, client_id: int, scope: str, now: datetime) -> Sequence[RowMapping]:
+        moment = tuple_(self.model.date, self.model.start_time)
+        join_on = [self.model.client_id == ClientModel.id]
+        if scope == "upcoming":
+            join_on += [self.model.date >= now.date(), moment >= tuple_(now.date(), now.time())]
+        elif scope == "past":
+            join_on += [self.model.date <= now.date(), moment < tuple_(now.date(), now.time())]
+        order = (self.model.date.desc(), self.model.start_time.desc()) if scope == "past" else (self.model.date, self.model.start_time)
+        query = (select(*columns,
+                        MasterModel.name.label("master_name"),
+                        MasterModel.surname.label("master_surname"),
+                        ServiceModel.name.label("service_name"),
+                        ServiceModel.duration)
+                 .select_from(ClientModel)
+                 .outerjoin(self.model, and_(*join_on))
+                 .outerjoin(MasterModel, MasterModel.id == self.model.master_id)
+                 .outerjoin(ServiceModel, ServiceModel.id == self.model.service_id)
+                 .where(ClientModel.id == client_id, ClientModel.id != 0)
+                 .order_by(*order))
+        result = await self.db.execute(query)
+        return result.mappings().all()
+
+    async def _swap_client(
+            self,
+            appointment_id: int,
+            expected_client_id: int,
+            new_client_id: int
+    ) -> tuple[AppointmentModel | None, int | None]:
+        current = (select(self.model.id, self.model.client_id)
+                   .where(self.model.id == appointment_id)
+                   .cte("current"))
+        updated = (update(self.model)
+                   .where(self.model.id == appointment_id,
+                          self.model.client_id == expected_client_id)
+                   .values(client_id=new_client_id)
+                   .returning(*self.model.__table__.c)
+                   .cte("updated"))
+        appointment = aliased(self.model, updated)
+        query = (select(current.c.client_id, appointment)
+                 .select_from(current)
+                 .outerjoin(updated, true()))
+        try:
+            result = await self.db.execute(query)
+            row = result.one_or_none()
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        if row is None:
+            return None, None
+        previous_client_id, appointment = row
+        return appointment, previous_client_id
+
+    async def book(self, appointment_id: int, client_id: int) -> tuple[AppointmentModel | None, int | None]:
+        return await self._swap_client(appointment_id, 0, client_id)
+
+    async def unbook(self, appointment_id: int, client_id: int) -> tuple[AppointmentModel | None, int | None]:
+        return await self._swap_client(appointment_id, client_id, 0)
+
+    async def create_many(self, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        try:
+            result = await self.db.execute(insert(self.model).returning(self.model.id), rows)
+            ids = list(result.scalars().all())
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        return ids
+
+    async def get_busy_intervals(self, master_ids: list[int], date_from: date, date_to: date):
+        query = (select(self.model.master_id, self.model.date, self.model.start_time, self.model.finish_time)
+                 .where(self.model.master_id.in_(master_ids),
+                        self.model.date >= date_from,
+                        self.model.date <= date_to)
+                 .order_by(self.model.master_id, self.model.date, self.model.start_time))
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def get_free_intervals(self, master_ids: list[int], service_id: int, date_from: date, date_to: date):
+        query = (select(self.model.id, self.model.master_id, self.model.date, self.model.start_time, self.model.finish_time)
+                 .where(self.model.master_id.in_(master_ids),
+                        self.model.service_id == service_id,
+                        self.model.client_id == 0,
+                        self.model.date >= date_from,
+                        self.model.date <= date_to)
+                 .order_by(self.model.date, self.model.start_time, self.model.master_id))
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def get_master_schedule(self, columns: list, master_id: int, date_from: date, date_to: date) -> Sequence[RowMapping]:
+        query = (select(*columns)
+                 .where(self.model.master_id == master_id,
+                        self.model.date >= date_from,
+                        self.model.date <= date_to)
+                 .order_by(self.model.date, self.model.start_time))
         result = await self.db.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        return result.mappings().all()
+
+    def build_filters(
+            self,
+            master_id: int | None = None,
+            client_id: int | None = None,
+            date_from: date | None = None,
+            date_to: date | None = None,
+            free: bool | None = None
+    ) -> list:
+        filters = []
+        if master_id is not None:
+            filters.append(self.model.master_id == master_id)
+        if client_id is not None:
+            filters.append(self.model.client_id == client_id)
+        if date_from is not None:
+            filters.append(self.model.date >= date_from)
+        if date_to is not None:
+            filters.append(self.model.date <= date_to)
+        if free is True:
+            filters.append(self.model.client_id == 0)
+        elif free is False:
+            filters.append(self.model.client_id != 0)
+        return filters
+
+    def _page_by_date_query(self, columns: list, filters, after: tuple[date, int] | None, limit: int):
+        query = select(*columns).where(*filters)
+        if after is not None:
+            query = query.where(tuple_(self.model.date, self.model.id) > tuple_(*after))
+        return query.order_by(self.model.date, self.model.id).limit(limit)
+
+    async def get_rows_page_by_date(
+            self,
+            columns: list,
+            *filters,
+            after: tuple[date, int] | None = None,
+            limit: int = DEFAULT_PAGE_SIZE
+    ) -> Sequence[RowMapping]:
+        result = await self.db.execute(self._page_by_date_query(columns, filters, after, limit))
+        return result.mappings().all()
+
+    async def stream_rows_by_date(self, columns: list, *filters, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[RowMapping]:
+        query = (select(*columns)
+                 .where(*filters)
+                 .order_by(self.model.date, self.model.id)
+                 .execution_options(yield_per=chunk_size))
+        result = await self.db.stream(query)
+        async for row in result.mappings():
+            yield row
@@ -1,35 +1,112 @@
-from typing import TypeVar, Generic, Type, Optional, List, Sequence
-from sqlalchemy import select
+from typing import TypeVar, Generic, Type, Optional, Sequence, AsyncIterator, Iterable
+from pydantic import BaseModel
+from sqlalchemy import select, exists, RowMapping, Select
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.util import identity_key
 from app.database.models import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 1000
+
+NOT_NULL_VIOLATION = "23502"
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+CHECK_VIOLATION = "23514"
+EXCLUSION_VIOLATION = "23P01"
+
+
+def sqlstate(exc: DBAPIError) -> str | None:
+    return getattr(exc.orig, "sqlstate", None) or getattr(exc.orig, "pgcode", None)
+
+
 class BaseRepository(Generic[ModelType]):
     def __init__(self, model: Type[ModelType], db: AsyncSession):
         self.model = model
         self.db = db
 
     async def get_by_id(self, id: int) -> Optional[ModelType]:
-        query = select(self.model).where(self.model.id == id)
+        return await self.db.get(self.model, id)
+
+    async def get_many(self, ids: Iterable[int]) -> dict[int, ModelType]:
+        found = {}
+        missing = []
+        for id in set(ids):
+            obj = self.db.identity_map.get(identity_key(self.model, id))
+            if obj is None:
+                missing.append(id)
+            else:
+                found[id] = obj
+        if missing:
+            result = await self.db.execute(select(self.model).where(self.model.id.in_(missing)))
+            found |= {obj.id: obj for obj in result.scalars().all()}
+        return found
+
+    async def get_existing_ids(self, ids: Iterable[int]) -> set[int]:
+        result = await self.db.execute(select(self.model.id).where(self.model.id.in_(set(ids))))
+        return set(result.scalars().all())
+
+    async def check_exists(self, refs: dict[Type[Base], int]) -> dict[Type[Base], bool]:
+        models = list(refs)
+        query = select(*(exists().where(model.id == refs[model]) for model in models))
         result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+        return dict(zip(models, result.one()))
 
     async def get_all(self) -> Sequence[ModelType]:
         result = await self.db.execute(select(self.model))
         return result.scalars().all()
 
+    def columns_for(self, schema: type[BaseModel]) -> list:
+        return [getattr(self.model, name) for name in schema.model_fields]
+
+    def _page_query(self, query: Select, filters, after_id: int | None, limit: int) -> Select:
+        query = query.where(*filters)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        return query.order_by(self.model.id).limit(limit)
+
+    async def get_page(self, *filters, after_id: int | None = None, limit: int = DEFAULT_PAGE_SIZE) -> Sequence[ModelType]:
+        result = await self.db.execute(self._page_query(select(self.model), filters, after_id, limit))
+        return result.scalars().all()
+
+    async def get_rows_page(
+            self,
+            columns: list,
+            *filters,
+            after_id: int | None = None,
+            limit: int = DEFAULT_PAGE_SIZE
+    ) -> Sequence[RowMapping]:
+        result = await self.db.execute(self._page_query(select(*columns), filters, after_id, limit))
+        return result.mappings().all()
+
+    async def stream_rows(self, columns: list, *filters, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[RowMapping]:
+        query = (select(*columns)
+                 .where(*filters)
+                 .order_by(self.model.id)
+                 .execution_options(yield_per=chunk_size))
+        result = await self.db.stream(query)
+        async for row in result.mappings():
+            yield row
+
     async def create(self, **kwargs) -> ModelType:
         obj = self.model(**kwargs)
         self.db.add(obj)
-        await self.db.commit()
-        await self.db.refresh(obj)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
         return obj
 
     async def delete(self, id: int) -> Optional[ModelType]:
         obj = await self.get_by_id(id)
+        if obj is None:
+            return None
 
         await self.db.delete(obj)
         await self.db.commit()
 
-        return obj
\ No newline at end of file
+        return obj
@@ -0,0 +1,298 @@
+import asyncio
+from datetime import date
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STAGING_TABLE = "csv_staging"
+COPY_QUEUE_SIZE = 16
+COPY_CHUNK_SIZE = 1 << 16
+REJECTS_LIMIT = 1000
+
+PHONE_PATTERN = r"^\d{10,20}$"
+
+
+class CsvFormatError(ValueError):
+    pass
+
+
+class CsvEntity:
+    def __init__(
+            self,
+            table: str,
+            columns: list[str],
+            required: list[str],
+            checks: list[tuple[str, str]],
+            file_keys: list[list[str]],
+            insert: str,
+            match: str,
+            export: str,
+            resolve: list[tuple[str, str, str]] | None = None,
+            exists: str | None = None
+    ):
+        self.table = table
+        self.columns = columns
+        self.required = required
+        self.checks = checks
+        self.file_keys = file_keys
+        self.insert = insert
+        self.match = match
+        self.export = export
+        self.resolve = resolve or []
+        self.exists = exists
+
+
+ENTITIES = {
+    "clients": CsvEntity(
+        table="Client",
+        columns=["id", "name", "surname", "phone", "tg_id"],
+        required=["name", "phone", "tg_id"],
+        checks=[
+            ("invalid_name", "coalesce(length(name), 0) NOT BETWEEN 1 AND 30"),
+            ("invalid_surname", "coalesce(length(surname), 0) > 80"),
+            ("invalid_phone", f"phone IS NULL OR phone !~ '{PHONE_PATTERN}'"),
+            ("invalid_tg_id", "coalesce(length(tg_id), 0) NOT BETWEEN 1 AND 50"),
+        ],
+        file_keys=[["phone"], ["tg_id"]],
+        exists='EXISTS (SELECT 1 FROM "Client" c WHERE c.phone = s.phone OR c.tg_id = s.tg_id)',
+        insert="""INSERT INTO "Client" (name, surname, phone, tg_id)
+                  SELECT name, nullif(surname, ''), phone, tg_id""",
+        match="i.tg_id = s.tg_id",
+        export="""SELECT id, name, surname, phone, tg_id FROM "Client" WHERE id <> 0 ORDER BY id""",
+    ),
+    "masters": CsvEntity(
+        table="Master",
+        columns=["id", "name", "surname", "phone"],
+        required=["name", "surname", "phone"],
+        checks=[
+            ("invalid_name", "coalesce(length(name), 0) NOT BETWEEN 1 AND 30"),
+            ("invalid_surname", "coalesce(length(surname), 0) NOT BETWEEN 1 AND 80"),
+            ("invalid_phone", f"phone IS NULL OR phone !~ '{PHONE_PATTERN}'"),
+        ],
+        file_keys=[["phone"]],
+        exists='EXISTS (SELECT 1 FROM "Master" m WHERE m.phone = s.phone)',
+        insert="""INSERT INTO "Master" (name, surname, phone)
+                  SELECT name, surname, phone""",
+        match="i.phone = s.phone",
+        export="""SELECT id, name, surname, phone FROM "Master" ORDER BY id""",
+    ),
+    "services": CsvEntity(
+        table="Service",
+        columns=["id", "name", "duration", "description", "default_price"],
+        required=["name", "duration", "default_price"],
+        checks=[
+            ("invalid_name", "coalesce(length(name), 0) NOT BETWEEN 1 AND 255"),
+            ("invalid_duration", "duration IS NULL OR NOT pg_input_is_valid(duration, 'time')"),
+            ("invalid_duration", "duration::time = '00:00'"),
+            ("invalid_price", "default_price IS NULL OR NOT pg_input_is_valid(default_price, 'integer')"),
+            ("invalid_price", "default_price::int < 0"),
+        ],
+        file_keys=[["name", "description", "default_price"]],
+        exists="""EXISTS (SELECT 1 FROM "Service" v WHERE v.name = s.name
+                  AND coalesce(v.description, '') = coalesce(s.description, '')
+                  AND v.default_price = s.default_price::int)""",
+        insert="""INSERT INTO "Service" (name, duration, description, default_price)
+                  SELECT name, duration::time, description, default_price::int""",
+        match="""i.name = s.name AND coalesce(i.description, '') = coalesce(s.description, '')
+                 AND i.default_price = s.default_price::int""",
+        export="""SELECT id, name, duration, description, default_price FROM "Service" ORDER BY id""",
+    ),
+    "appointments": CsvEntity(
+        table="Appointment",
+        columns=["id", "date", "start_time", "finish_time", "price", "client_phone", "master_phone", "service_name"],
+        required=["date", "start_time", "finish_time", "price", "master_phone", "service_name"],
+        checks=[
+            ("invalid_date", "date IS NULL OR NOT pg_input_is_valid(date, 'date')"),
+            ("invalid_time", "start_time IS NULL OR finish_time IS NULL "
+                             "OR NOT pg_input_is_valid(start_time, 'time') "
+                             "OR NOT pg_input_is_valid(finish_time, 'time')"),
+            ("invalid_time", "finish_time::time <= start_time::time"),
+            ("invalid_price", "price IS NULL OR NOT pg_input_is_valid(price, 'integer')"),
+            ("invalid_price", "price::int < 0"),
+        ],
+        resolve=[
+            ("unknown_master", "master_ref", """(SELECT m.id FROM "Master" m WHERE m.phone = s.master_phone
+                                                ORDER BY m.id LIMIT 1)"""),
+            ("unknown_service", "service_ref", """(SELECT v.id FROM "Service" v WHERE v.name = s.service_name
+                                                  ORDER BY v.id LIMIT 1)"""),
+            ("unknown_client", "client_ref", """CASE WHEN s.client_phone IS NULL THEN 0
+                                                ELSE (SELECT c.id FROM "Client" c
+                                                      WHERE c.phone = s.client_phone AND c.id <> 0
+                                                      ORDER BY c.id LIMIT 1) END"""),
+        ],
+        file_keys=[["master_phone", "date", "start_time"]],
+        insert="""INSERT INTO "Appointment" (date, start_time, finish_time, price, client_id, master_id, service_id)
+                  SELECT date::date, start_time::time, finish_time::time, price::int,
+                         client_ref, master_ref, service_ref""",
+        match="i.master_id = s.master_ref AND i.date = s.date::date AND i.start_time = s.start_time::time",
+        export="""SELECT a.id, a.date, a.start_time, a.finish_time, a.price,
+                         nullif(c.phone, '0000000000') AS client_phone,
+                         m.phone AS master_phone, v.name AS service_name
+                  FROM "Appointment" a
+                  JOIN "Client" c ON c.id = a.client_id
+                  JOIN "Master" m ON m.id = a.master_id
+                  JOIN "Service" v ON v.id = a.service_id
+                  WHERE ({date_filter})
+                  ORDER BY a.date, a.id""",
+    ),
+}
+
+
+class BulkRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _driver_connection(self):
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        return raw.driver_connection
+
+    def _driver(self) -> str:
+        return self.db.bind.dialect.driver
+
+    def _copy_errors(self) -> tuple[type[Exception], ...]:
+        if self._driver() == "asyncpg":
+            from asyncpg import PostgresError
+            return (PostgresError,)
+        from psycopg import Error
+        return (Error,)
+
+    async def _copy_in(self, columns: list[str], chunks: AsyncIterator[bytes]) -> None:
+        raw = await self._driver_connection()
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        try:
+            if self._driver() == "asyncpg":
+                await raw.copy_to_table(STAGING_TABLE, source=chunks, columns=columns, format="csv")
+                return
+            async with raw.cursor() as cursor:
+                async with cursor.copy(f"COPY {STAGING_TABLE} ({column_list}) FROM STDIN (FORMAT csv)") as copy:
+                    async for chunk in chunks:
+                        await copy.write(chunk)
+        except self._copy_errors() as e:
+            raise CsvFormatError(str(e).splitlines()[0]) from e
+
+    async def copy_out(self, query: str) -> AsyncIterator[bytes]:
+        raw = await self._driver_connection()
+        if self._driver() == "asyncpg":
+            queue: asyncio.Queue = asyncio.Queue(COPY_QUEUE_SIZE)
+            done = object()
+
+            async def produce():
+                try:
+                    await raw.copy_from_query(query, output=queue.put, format="csv", header=True)
+                finally:
+                    await queue.put(done)
+
+            task = asyncio.create_task(produce())
+            try:
+                while (chunk := await queue.get()) is not done:
+                    yield bytes(chunk)
+                await task
+            finally:
+                task.cancel()
+            return
+        async with raw.cursor() as cursor:
+            async with cursor.copy(f"COPY ({query}) TO STDOUT (FORMAT csv, HEADER)") as copy:
+                buffer = bytearray()
+                async for chunk in copy:
+                    buffer += chunk
+                    if len(buffer) >= COPY_CHUNK_SIZE:
+                        yield bytes(buffer)
+                        buffer.clear()
+                if buffer:
+                    yield bytes(buffer)
+
+    async def _flag(self, reason: str, condition: str) -> None:
+        await self.db.execute(
+            text(f"UPDATE {STAGING_TABLE} s SET reason = :reason "
+                 f"WHERE CASE WHEN s.reason IS NULL THEN ({condition}) ELSE false END"),
+            {"reason": reason}
+        )
+
+    async def import_csv(self, entity: CsvEntity, columns: list[str], chunks: AsyncIterator[bytes]) -> dict:
+        try:
+            return await self._import_csv(entity, columns, chunks)
+        except (DBAPIError, CsvFormatError):
+            await self.db.rollback()
+            raise
+
+    async def _import_csv(self, entity: CsvEntity, columns: list[str], chunks: AsyncIterator[bytes]) -> dict:
+        staged = ", ".join(f'"{column}" text' for column in entity.columns)
+        refs = "".join(f", {ref} integer" for _, ref, _ in entity.resolve)
+        await self.db.execute(text(
+            f"CREATE TEMP TABLE {STAGING_TABLE} (line bigserial, reason text, {staged}{refs}) ON COMMIT DROP"
+        ))
+        await self._copy_in(columns, chunks)
+        await self.db.execute(text(
+            f"UPDATE {STAGING_TABLE} SET " + ", ".join(
+                f'"{column}" = nullif(btrim("{column}"), \'\')' for column in entity.columns
+            )
+        ))
+
+        for reason, condition in entity.checks:
+            await self._flag(reason, condition)
+        for reason, ref, expression in entity.resolve:
+            await self.db.execute(text(f"UPDATE {STAGING_TABLE} s SET {ref} = {expression} WHERE s.reason IS NULL"))
+            await self._flag(reason, f"s.{ref} IS NULL")
+        for key in entity.file_keys:
+            partition = ", ".join(f'"{column}"' for column in key)
+            await self._flag("duplicate_in_file", f"""s.line IN (
+                SELECT line FROM (
+                    SELECT line, row_number() OVER (PARTITION BY {partition} ORDER BY line) AS position
+                    FROM {STAGING_TABLE} WHERE reason IS NULL
+                ) ranked WHERE position > 1
+            )""")
+        if entity.exists:
+            await self._flag("exists", entity.exists)
+
+        result = await self.db.execute(text(f"""
+            WITH inserted AS (
+                {entity.insert}
+                FROM {STAGING_TABLE} s WHERE s.reason IS NULL ORDER BY s.line
+                ON CONFLICT DO NOTHING
+                RETURNING *
+            ), flagged AS (
+                UPDATE {STAGING_TABLE} s SET reason = 'conflict'
+                WHERE CASE WHEN s.reason IS NULL
+                           THEN NOT EXISTS (SELECT 1 FROM inserted i WHERE {entity.match})
+                           ELSE false END
+                RETURNING s.line
+            )
+            SELECT count(*) FROM inserted
+        """))
+        inserted = result.scalar_one()
+        master_ids = []
+        if any(ref == "master_ref" for _, ref, _ in entity.resolve):
+            result = await self.db.execute(text(
+                f"SELECT DISTINCT master_ref FROM {STAGING_TABLE} WHERE reason IS NULL"
+            ))
+            master_ids = list(result.scalars().all())
+
+        summary = await self.db.execute(text(
+            f"SELECT reason, count(*) FROM {STAGING_TABLE} WHERE reason IS NOT NULL GROUP BY reason ORDER BY reason"
+        ))
+        reasons = dict(summary.all())
+        rejects = await self.db.execute(text(
+            f"SELECT line, reason FROM {STAGING_TABLE} WHERE reason IS NOT NULL ORDER BY line LIMIT {REJECTS_LIMIT}"
+        ))
+        received = await self.db.execute(text(f"SELECT count(*) FROM {STAGING_TABLE}"))
+        rows = {
+            "received": received.scalar_one(),
+            "inserted": inserted,
+            "rejected": sum(reasons.values()),
+            "reasons": reasons,
+            "rejects": [{"row": line, "reason": reason} for line, reason in rejects.all()],
+            "master_ids": master_ids,
+        }
+        await self.db.commit()
+        return rows
+
+    def export_query(self, entity: CsvEntity, date_from: date | None = None, date_to: date | None = None) -> str:
+        filters = ["TRUE"]
+        if date_from is not None:
+            filters.append(f"a.date >= '{date_from.isoformat()}'")
+        if date_to is not None:
+            filters.append(f"a.date <= '{date_to.isoformat()}'")
+        return entity.export.format(date_filter=" AND ".join(filters))
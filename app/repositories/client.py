@@ -1,10 +1,21 @@
-from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from typing import Iterable, Sequence
+
+from sqlalchemy import select, or_, func, literal_column, RowMapping
 from app.repositories.base import BaseRepository
 from app.database.models import Client as ClientModel
 
 
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 class ClientRepository(BaseRepository[ClientModel]):
+    def build_filters(self) -> list:
+        return [self.model.id != 0]
+
     async def get_by_phone_or_tg_id(self, phone: str, tg_id: str | None) -> ClientModel | None:
         query = select(self.model).where(
             or_(
@@ -18,4 +29,30 @@ class ClientRepository(BaseRepository[ClientModel]):
     async def get_by_tg_id(self, tg_id: str) -> ClientModel | None:
         query = select(self.model).where(self.model.tg_id == tg_id)
         result = await self.db.execute(query)
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+    def _full_name(self):
+        return func.lower(self.model.name + literal_column("' '") + func.coalesce(self.model.surname, literal_column("''")))
+
+    async def search(self, columns: list, query_text: str, limit: int) -> Sequence[RowMapping]:
+        digits = "".join(char for char in query_text if char.isdigit())
+        if digits and not any(char.isalpha() for char in query_text):
+            condition = self.model.phone.like(f"{digits}%")
+            order = (self.model.phone,)
+        else:
+            term = query_text.lower()
+            full_name = self._full_name()
+            prefix = full_name.like(f"{_escape_like(term)}%")
+            condition = or_(prefix, full_name.bool_op("%>")(term)) if len(term) >= TRIGRAM_MIN_LENGTH else prefix
+            order = (prefix.desc(), func.word_similarity(term, full_name).desc(), self.model.id)
+        query = (select(*columns)
+                 .where(condition, self.model.id != 0)
+                 .order_by(*order)
+                 .limit(limit))
+        result = await self.db.execute(query)
+        return result.mappings().all()
+
+    async def get_by_tg_ids(self, tg_ids: Iterable[str]) -> Sequence[ClientModel]:
+        query = select(self.model).where(self.model.tg_id.in_(set(tg_ids)))
+        result = await self.db.execute(query)
+        return result.scalars().all()
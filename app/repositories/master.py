@@ -1,9 +1,9 @@
-from typing import Optional
+from typing import Sequence
 
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
-from app.repositories.base import BaseRepository, ModelType
-from app.database.models import Master as MasterModel
+from sqlalchemy import select, exists, insert, func, RowMapping
+from sqlalchemy.orm import selectinload, joinedload
+from app.repositories.base import BaseRepository
+from app.database.models import Master as MasterModel, Service as ServiceModel, masters_services
 
 
 class MasterRepository(BaseRepository[MasterModel]):
@@ -15,10 +15,38 @@ class MasterRepository(BaseRepository[MasterModel]):
 
     async def get_with_services(self, master_id: int) -> MasterModel | None:
         query = ((select(self.model)
-                 .options(selectinload(self.model.services)))
-                 .where(self.model.id == master_id))
+                 .options(joinedload(self.model.services)))
+                 .where(self.model.id == master_id)
+                 .execution_options(populate_existing=True))
         result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+        return result.unique().scalar_one_or_none()
+
+    async def get_service_link_state(self, master_id: int, service_id: int) -> tuple[bool, bool, bool]:
+        query = select(
+            exists().where(self.model.id == master_id),
+            exists().where(ServiceModel.id == service_id),
+            exists().where(masters_services.c.master_id == master_id,
+                           masters_services.c.service_id == service_id)
+        )
+        result = await self.db.execute(query)
+        return tuple(result.one())
+
+    async def add_service(self, master_id: int, service_id: int, price: int | None = None) -> None:
+        await self.db.execute(
+            insert(masters_services).values(master_id=master_id, service_id=service_id, price=price)
+        )
+        await self.db.commit()
+
+    async def get_catalog_rows(self, columns: list) -> Sequence[RowMapping]:
+        query = (select(*columns,
+                        masters_services.c.service_id,
+                        func.coalesce(masters_services.c.price, ServiceModel.default_price).label("price"))
+                 .select_from(self.model)
+                 .outerjoin(masters_services, masters_services.c.master_id == self.model.id)
+                 .outerjoin(ServiceModel, ServiceModel.id == masters_services.c.service_id)
+                 .order_by(self.model.id, masters_services.c.service_id))
+        result = await self.db.execute(query)
+        return result.mappings().all()
 
     async def get_with_appointments(self, master_id: int) -> MasterModel | None:
         query = ((select(self.model)
@@ -27,3 +55,18 @@ class MasterRepository(BaseRepository[MasterModel]):
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_ids_by_service(self, service_id: int, master_id: int | None = None) -> list[int]:
+        query = (select(masters_services.c.master_id)
+                 .where(masters_services.c.service_id == service_id)
+                 .order_by(masters_services.c.master_id))
+        if master_id is not None:
+            query = query.where(masters_services.c.master_id == master_id)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    async def get_service_price(self, master_id: int, service_id: int) -> int | None:
+        query = (select(masters_services.c.price)
+                 .where(masters_services.c.master_id == master_id,
+                        masters_services.c.service_id == service_id))
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
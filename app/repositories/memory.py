@@ -0,0 +1,554 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, time
+from itertools import islice
+from typing import AsyncIterator, Callable, Generic, Iterable, Optional, Sequence, Type
+
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+
+from app.database.models import Base
+from app.database.models import Appointment as AppointmentModel
+from app.database.models import Client as ClientModel, Master as MasterModel, Service as ServiceModel
+from app.repositories.appointment import AppointmentRepository
+from app.repositories.base import (
+    ModelType, DEFAULT_PAGE_SIZE, STREAM_CHUNK_SIZE,
+    NOT_NULL_VIOLATION, FOREIGN_KEY_VIOLATION, UNIQUE_VIOLATION, CHECK_VIOLATION, EXCLUSION_VIOLATION
+)
+from app.repositories.client import ClientRepository, TRIGRAM_MIN_LENGTH
+from app.repositories.master import MasterRepository
+from app.repositories.service import ServiceRepository
+
+Row = dict
+Filter = Callable[[Row], bool]
+
+BusyInterval = namedtuple("BusyInterval", "master_id date start_time finish_time")
+FreeInterval = namedtuple("FreeInterval", "id master_id date start_time finish_time")
+
+
+class ConstraintViolation(Exception):
+    def __init__(self, sqlstate: str, constraint: str):
+        super().__init__(f'violates constraint "{constraint}"')
+        self.sqlstate = sqlstate
+
+
+def violation(sqlstate: str, constraint: str) -> IntegrityError:
+    return IntegrityError(None, None, ConstraintViolation(sqlstate, constraint))
+
+
+class MemoryTable:
+    def __init__(self, store: "MemoryStore", model: Type[Base]):
+        self.store = store
+        self.model = model
+        self.name = model.__tablename__
+        columns = model.__table__.columns
+        self.columns = [column.key for column in columns]
+        self.required = [
+            column.key for column in columns
+            if not column.nullable and column.default is None and column.server_default is None and column.key != "id"
+        ]
+        self.rows: dict[int, Row] = {}
+        self.ids: list[int] = []
+        self.next_id = 1
+
+    def instance(self, row: Row):
+        return self.model(**row)
+
+    def scan(self, filters: Iterable[Filter] = (), after_id: int | None = None) -> Iterable[Row]:
+        start = 0 if after_id is None else bisect_right(self.ids, after_id)
+        for id in islice(self.ids, start, None):
+            row = self.rows[id]
+            if all(condition(row) for condition in filters):
+                yield row
+
+    def check(self, row: Row) -> None:
+        for key in self.required:
+            if row[key] is None:
+                raise violation(NOT_NULL_VIOLATION, f"{self.name}.{key}")
+
+    def index(self, row: Row) -> None:
+        pass
+
+    def unindex(self, row: Row) -> None:
+        pass
+
+    def references(self, column: str, model: Type[Base], value: int) -> None:
+        if value not in self.store.tables[model].rows:
+            raise violation(FOREIGN_KEY_VIOLATION, f"{self.name}_{column}_fkey")
+
+    def insert(self, values: dict) -> Row:
+        row = {key: values.get(key) for key in self.columns}
+        if row["id"] is None:
+            row["id"] = self.next_id
+            self.next_id += 1
+        elif row["id"] in self.rows:
+            raise violation(UNIQUE_VIOLATION, f"{self.name}_pkey")
+        self.check(row)
+        self.rows[row["id"]] = row
+        insort(self.ids, row["id"])
+        self.index(row)
+        return row
+
+    def update(self, id: int, **values) -> Row:
+        old = self.rows[id]
+        row = old | values
+        self.unindex(old)
+        try:
+            self.check(row)
+        except IntegrityError:
+            self.index(old)
+            raise
+        self.rows[id] = row
+        self.index(row)
+        return row
+
+    def delete(self, id: int) -> Row | None:
+        row = self.rows.pop(id, None)
+        if row is not None:
+            del self.ids[bisect_left(self.ids, id)]
+            self.unindex(row)
+        return row
+
+
+class ClientTable(MemoryTable):
+    def __init__(self, store: "MemoryStore"):
+        super().__init__(store, ClientModel)
+        self.by_tg_id: dict[str, int] = {}
+        self.by_phone: dict[str, set[int]] = defaultdict(set)
+
+    def check(self, row: Row) -> None:
+        super().check(row)
+        if self.by_tg_id.get(row["tg_id"], row["id"]) != row["id"]:
+            raise violation(UNIQUE_VIOLATION, "ix_Client_tg_id")
+
+    def index(self, row: Row) -> None:
+        self.by_tg_id[row["tg_id"]] = row["id"]
+        self.by_phone[row["phone"]].add(row["id"])
+
+    def unindex(self, row: Row) -> None:
+        self.by_tg_id.pop(row["tg_id"], None)
+        self.by_phone[row["phone"]].discard(row["id"])
+
+
+class MasterTable(MemoryTable):
+    def __init__(self, store: "MemoryStore"):
+        super().__init__(store, MasterModel)
+        self.by_phone: dict[str, set[int]] = defaultdict(set)
+
+    def index(self, row: Row) -> None:
+        self.by_phone[row["phone"]].add(row["id"])
+
+    def unindex(self, row: Row) -> None:
+        self.by_phone[row["phone"]].discard(row["id"])
+
+
+class ServiceTable(MemoryTable):
+    def __init__(self, store: "MemoryStore"):
+        super().__init__(store, ServiceModel)
+        self.by_info: dict[tuple, set[int]] = defaultdict(set)
+
+    @staticmethod
+    def info(row: Row) -> tuple:
+        return row["name"], row["description"], row["default_price"]
+
+    def index(self, row: Row) -> None:
+        self.by_info[self.info(row)].add(row["id"])
+
+    def unindex(self, row: Row) -> None:
+        self.by_info[self.info(row)].discard(row["id"])
+
+
+class AppointmentTable(MemoryTable):
+    def __init__(self, store: "MemoryStore"):
+        super().__init__(store, AppointmentModel)
+        self.slots: dict[tuple[int, date], list[tuple[time, time, int]]] = defaultdict(list)
+        self.by_client: dict[int, set[int]] = defaultdict(set)
+        self.by_master: dict[int, set[int]] = defaultdict(set)
+        self.by_date: list[tuple[date, int]] = []
+
+    def overlapping(self, master_id: int, day: date, start_time: time, finish_time: time) -> int | None:
+        slots = self.slots.get((master_id, day))
+        if not slots:
+            return None
+        index = bisect_right(slots, start_time, key=lambda slot: slot[1])
+        if index < len(slots) and slots[index][0] < finish_time:
+            return slots[index][2]
+        return None
+
+    def check(self, row: Row) -> None:
+        super().check(row)
+        if row["finish_time"] <= row["start_time"]:
+            raise violation(CHECK_VIOLATION, "ck_Appointment_time_order")
+        if self.overlapping(row["master_id"], row["date"], row["start_time"], row["finish_time"]) is not None:
+            raise violation(EXCLUSION_VIOLATION, "ex_Appointment_master_overlap")
+        self.references("client_id", ClientModel, row["client_id"])
+        self.references("master_id", MasterModel, row["master_id"])
+        self.references("service_id", ServiceModel, row["service_id"])
+
+    def index(self, row: Row) -> None:
+        insort(self.slots[(row["master_id"], row["date"])], (row["start_time"], row["finish_time"], row["id"]))
+        self.by_client[row["client_id"]].add(row["id"])
+        self.by_master[row["master_id"]].add(row["id"])
+        insort(self.by_date, (row["date"], row["id"]))
+
+    def unindex(self, row: Row) -> None:
+        slots = self.slots[(row["master_id"], row["date"])]
+        del slots[bisect_left(slots, (row["start_time"], row["finish_time"], row["id"]))]
+        self.by_client[row["client_id"]].discard(row["id"])
+        self.by_master[row["master_id"]].discard(row["id"])
+        del self.by_date[bisect_left(self.by_date, (row["date"], row["id"]))]
+
+    def insert(self, values: dict) -> Row:
+        return super().insert({"created_at": datetime.now()} | values)
+
+
+class MemoryStore:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.tables: dict[Type[Base], MemoryTable] = {}
+        for table in (ClientTable(self), MasterTable(self), ServiceTable(self), AppointmentTable(self)):
+            self.tables[table.model] = table
+        self.master_services: dict[tuple[int, int], int | None] = {}
+        self.services_by_master: dict[int, set[int]] = defaultdict(set)
+        self.masters_by_service: dict[int, set[int]] = defaultdict(set)
+        self.tables[ClientModel].insert({"id": 0, "name": "Нет клиента", "phone": "0000000000", "tg_id": "0"})
+
+    def link(self, master_id: int, service_id: int, price: int | None = None) -> None:
+        if (master_id, service_id) in self.master_services:
+            raise violation(UNIQUE_VIOLATION, "Masters_services_pkey")
+        if master_id not in self.tables[MasterModel].rows:
+            raise violation(FOREIGN_KEY_VIOLATION, "Masters_services_master_id_fkey")
+        if service_id not in self.tables[ServiceModel].rows:
+            raise violation(FOREIGN_KEY_VIOLATION, "Masters_services_service_id_fkey")
+        self.master_services[(master_id, service_id)] = price
+        self.services_by_master[master_id].add(service_id)
+        self.masters_by_service[service_id].add(master_id)
+
+
+def project(row: Row, columns: list) -> Row:
+    return {column.key: row[column.key] for column in columns}
+
+
+class MemoryRepository(Generic[ModelType]):
+    def __init__(self, model: Type[ModelType], db: MemoryStore):
+        self.model = model
+        self.db = db
+        self.table = db.tables[model]
+
+    async def get_by_id(self, id: int) -> Optional[ModelType]:
+        row = self.table.rows.get(id)
+        return self.table.instance(row) if row is not None else None
+
+    async def get_many(self, ids: Iterable[int]) -> dict[int, ModelType]:
+        rows = self.table.rows
+        return {id: self.table.instance(rows[id]) for id in set(ids) if id in rows}
+
+    async def get_existing_ids(self, ids: Iterable[int]) -> set[int]:
+        return {id for id in set(ids) if id in self.table.rows}
+
+    async def check_exists(self, refs: dict[Type[Base], int]) -> dict[Type[Base], bool]:
+        return {model: id in self.db.tables[model].rows for model, id in refs.items()}
+
+    async def get_all(self) -> Sequence[ModelType]:
+        return [self.table.instance(row) for row in self.table.scan()]
+
+    def columns_for(self, schema: type[BaseModel]) -> list:
+        return [getattr(self.model, name) for name in schema.model_fields]
+
+    def _page(self, filters, after_id: int | None, limit: int) -> list[Row]:
+        return list(islice(self.table.scan(filters, after_id), limit))
+
+    async def get_page(self, *filters, after_id: int | None = None, limit: int = DEFAULT_PAGE_SIZE) -> Sequence[ModelType]:
+        return [self.table.instance(row) for row in self._page(filters, after_id, limit)]
+
+    async def get_rows_page(
+            self,
+            columns: list,
+            *filters,
+            after_id: int | None = None,
+            limit: int = DEFAULT_PAGE_SIZE
+    ) -> Sequence[Row]:
+        return [project(row, columns) for row in self._page(filters, after_id, limit)]
+
+    async def stream_rows(self, columns: list, *filters, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[Row]:
+        after_id = None
+        while True:
+            page = self._page(filters, after_id, chunk_size)
+            for row in page:
+                yield project(row, columns)
+            if len(page) < chunk_size:
+                return
+            after_id = page[-1]["id"]
+
+    async def create(self, **kwargs) -> ModelType:
+        return self.table.instance(self.table.insert(kwargs))
+
+    async def delete(self, id: int) -> Optional[ModelType]:
+        row = self.table.delete(id)
+        return self.table.instance(row) if row is not None else None
+
+
+def _registered(row: Row) -> bool:
+    return row["id"] != 0
+
+
+def _full_name(row: Row) -> str:
+    return f"{row['name']} {row['surname'] or ''}".lower()
+
+
+class MemoryClientRepository(MemoryRepository[ClientModel]):
+    def build_filters(self) -> list:
+        return [_registered]
+
+    async def get_by_phone_or_tg_id(self, phone: str, tg_id: str | None) -> ClientModel | None:
+        ids = set(self.table.by_phone.get(phone, ()))
+        if tg_id in self.table.by_tg_id:
+            ids.add(self.table.by_tg_id[tg_id])
+        return self.table.instance(self.table.rows[min(ids)]) if ids else None
+
+    async def get_by_tg_id(self, tg_id: str) -> ClientModel | None:
+        id = self.table.by_tg_id.get(tg_id)
+        return self.table.instance(self.table.rows[id]) if id is not None else None
+
+    async def search(self, columns: list, query_text: str, limit: int) -> Sequence[Row]:
+        digits = "".join(char for char in query_text if char.isdigit())
+        if digits and not any(char.isalpha() for char in query_text):
+            found = [row for row in self.table.scan([_registered]) if row["phone"].startswith(digits)]
+            found.sort(key=lambda row: (row["phone"], row["id"]))
+        else:
+            term = query_text.lower()
+            fuzzy = len(term) >= TRIGRAM_MIN_LENGTH
+            found = []
+            for row in self.table.scan([_registered]):
+                full_name = _full_name(row)
+                if full_name.startswith(term) or (fuzzy and term in full_name):
+                    found.append(row)
+            found.sort(key=lambda row: (not _full_name(row).startswith(term), row["id"]))
+        return [project(row, columns) for row in found[:limit]]
+
+    async def get_by_tg_ids(self, tg_ids: Iterable[str]) -> Sequence[ClientModel]:
+        by_tg_id = self.table.by_tg_id
+        return [self.table.instance(self.table.rows[by_tg_id[tg_id]]) for tg_id in set(tg_ids) if tg_id in by_tg_id]
+
+
+class MemoryMasterRepository(MemoryRepository[MasterModel]):
+    async def get_by_phone(self, master_phone: str) -> MasterModel | None:
+        ids = self.table.by_phone.get(master_phone)
+        return self.table.instance(self.table.rows[min(ids)]) if ids else None
+
+    async def get_with_services(self, master_id: int) -> MasterModel | None:
+        master = await self.get_by_id(master_id)
+        if master is not None:
+            services = self.db.tables[ServiceModel]
+            master.services = [services.instance(services.rows[id]) for id in sorted(self.db.services_by_master[master_id])]
+        return master
+
+    async def get_service_link_state(self, master_id: int, service_id: int) -> tuple[bool, bool, bool]:
+        return (
+            master_id in self.table.rows,
+            service_id in self.db.tables[ServiceModel].rows,
+            (master_id, service_id) in self.db.master_services
+        )
+
+    async def add_service(self, master_id: int, service_id: int, price: int | None = None) -> None:
+        self.db.link(master_id, service_id, price)
+
+    async def get_catalog_rows(self, columns: list) -> Sequence[Row]:
+        services = self.db.tables[ServiceModel].rows
+        rows = []
+        for master in self.table.scan():
+            base = project(master, columns)
+            service_ids = sorted(self.db.services_by_master.get(master["id"], ()))
+            if not service_ids:
+                rows.append(base | {"service_id": None, "price": None})
+            for service_id in service_ids:
+                price = self.db.master_services[(master["id"], service_id)]
+                if price is None:
+                    price = services[service_id]["default_price"]
+                rows.append(base | {"service_id": service_id, "price": price})
+        return rows
+
+    async def get_with_appointments(self, master_id: int) -> MasterModel | None:
+        master = await self.get_by_id(master_id)
+        if master is not None:
+            appointments = self.db.tables[AppointmentModel]
+            master.appointments = [
+                appointments.instance(appointments.rows[id]) for id in sorted(appointments.by_master[master_id])
+            ]
+        return master
+
+    async def get_ids_by_service(self, service_id: int, master_id: int | None = None) -> list[int]:
+        ids = sorted(self.db.masters_by_service.get(service_id, ()))
+        if master_id is not None:
+            ids = [id for id in ids if id == master_id]
+        return ids
+
+    async def get_service_price(self, master_id: int, service_id: int) -> int | None:
+        return self.db.master_services.get((master_id, service_id))
+
+
+class MemoryServiceRepository(MemoryRepository[ServiceModel]):
+    async def get_by_info(self, name: str, description: str, default_price: int) -> ServiceModel | None:
+        ids = self.table.by_info.get((name, description, default_price))
+        return self.table.instance(self.table.rows[min(ids)]) if ids else None
+
+
+class MemoryAppointmentRepository(MemoryRepository[AppointmentModel]):
+    async def find_existing_slot(
+            self,
+            date, start_time, finish_time, master_id
+    ) -> AppointmentModel | None:
+        id = self.table.overlapping(master_id, date, start_time, finish_time)
+        return self.table.instance(self.table.rows[id]) if id is not None else None
+
+    async def get_client_bookings(self, columns: list, client_id: int, scope: str, now: datetime) -> Sequence[Row]:
+        if client_id == 0 or client_id not in self.db.tables[ClientModel].rows:
+            return []
+        moment = (now.date(), now.time())
+        rows = [self.table.rows[id] for id in self.table.by_client.get(client_id, ())]
+        if scope == "upcoming":
+            rows = [row for row in rows if (row["date"], row["start_time"]) >= moment]
+        elif scope == "past":
+            rows = [row for row in rows if (row["date"], row["start_time"]) < moment]
+        rows.sort(key=lambda row: (row["date"], row["start_time"]), reverse=scope == "past")
+        if not rows:
+            empty = {column.key: None for column in columns}
+            return [empty | {"master_name": None, "master_surname": None, "service_name": None, "duration": None}]
+        masters = self.db.tables[MasterModel].rows
+        services = self.db.tables[ServiceModel].rows
+        return [
+            project(row, columns) | {
+                "master_name": masters[row["master_id"]]["name"],
+                "master_surname": masters[row["master_id"]]["surname"],
+                "service_name": services[row["service_id"]]["name"],
+                "duration": services[row["service_id"]]["duration"],
+            }
+            for row in rows
+        ]
+
+    async def _swap_client(
+            self,
+            appointment_id: int,
+            expected_client_id: int,
+            new_client_id: int
+    ) -> tuple[AppointmentModel | None, int | None]:
+        row = self.table.rows.get(appointment_id)
+        if row is None:
+            return None, None
+        previous_client_id = row["client_id"]
+        if previous_client_id != expected_client_id:
+            return None, previous_client_id
+        return self.table.instance(self.table.update(appointment_id, client_id=new_client_id)), previous_client_id
+
+    async def book(self, appointment_id: int, client_id: int) -> tuple[AppointmentModel | None, int | None]:
+        return await self._swap_client(appointment_id, 0, client_id)
+
+    async def unbook(self, appointment_id: int, client_id: int) -> tuple[AppointmentModel | None, int | None]:
+        return await self._swap_client(appointment_id, client_id, 0)
+
+    async def create_many(self, rows: list[dict]) -> list[int]:
+        created = []
+        try:
+            for values in rows:
+                created.append(self.table.insert(values)["id"])
+        except IntegrityError:
+            for id in created:
+                self.table.delete(id)
+            raise
+        return created
+
+    def _between(self, master_ids: Iterable[int], date_from: date, date_to: date) -> list[Row]:
+        rows = []
+        days = (date_to - date_from).days + 1
+        for master_id in sorted(set(master_ids)):
+            ids = self.table.by_master.get(master_id, ())
+            if days > len(ids):
+                found = [self.table.rows[id] for id in ids]
+                found = [row for row in found if date_from <= row["date"] <= date_to]
+                rows += sorted(found, key=lambda row: (row["date"], row["start_time"]))
+                continue
+            for day in range(date_from.toordinal(), date_to.toordinal() + 1):
+                slots = self.table.slots.get((master_id, date.fromordinal(day)), ())
+                rows += [self.table.rows[id] for _, _, id in slots]
+        return rows
+
+    async def get_busy_intervals(self, master_ids: list[int], date_from: date, date_to: date):
+        return [
+            BusyInterval(row["master_id"], row["date"], row["start_time"], row["finish_time"])
+            for row in self._between(master_ids, date_from, date_to)
+        ]
+
+    async def get_free_intervals(self, master_ids: list[int], service_id: int, date_from: date, date_to: date):
+        rows = [
+            row for row in self._between(master_ids, date_from, date_to)
+            if row["client_id"] == 0 and row["service_id"] == service_id
+        ]
+        rows.sort(key=lambda row: (row["date"], row["start_time"], row["master_id"]))
+        return [
+            FreeInterval(row["id"], row["master_id"], row["date"], row["start_time"], row["finish_time"])
+            for row in rows
+        ]
+
+    async def get_master_schedule(self, columns: list, master_id: int, date_from: date, date_to: date) -> Sequence[Row]:
+        return [project(row, columns) for row in self._between([master_id], date_from, date_to)]
+
+    def build_filters(
+            self,
+            master_id: int | None = None,
+            client_id: int | None = None,
+            date_from: date | None = None,
+            date_to: date | None = None,
+            free: bool | None = None
+    ) -> list:
+        filters = []
+        if master_id is not None:
+            filters.append(lambda row: row["master_id"] == master_id)
+        if client_id is not None:
+            filters.append(lambda row: row["client_id"] == client_id)
+        if date_from is not None:
+            filters.append(lambda row: row["date"] >= date_from)
+        if date_to is not None:
+            filters.append(lambda row: row["date"] <= date_to)
+        if free is True:
+            filters.append(lambda row: row["client_id"] == 0)
+        elif free is False:
+            filters.append(lambda row: row["client_id"] != 0)
+        return filters
+
+    def _scan_by_date(self, filters, after: tuple[date, int] | None) -> Iterable[Row]:
+        start = 0 if after is None else bisect_right(self.table.by_date, tuple(after))
+        for _, id in islice(self.table.by_date, start, None):
+            row = self.table.rows[id]
+            if all(condition(row) for condition in filters):
+                yield row
+
+    async def get_rows_page_by_date(
+            self,
+            columns: list,
+            *filters,
+            after: tuple[date, int] | None = None,
+            limit: int = DEFAULT_PAGE_SIZE
+    ) -> Sequence[Row]:
+        return [project(row, columns) for row in islice(self._scan_by_date(filters, after), limit)]
+
+    async def stream_rows_by_date(self, columns: list, *filters, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[Row]:
+        after = None
+        while True:
+            page = list(islice(self._scan_by_date(filters, after), chunk_size))
+            for row in page:
+                yield project(row, columns)
+            if len(page) < chunk_size:
+                return
+            after = (page[-1]["date"], page[-1]["id"])
+
+
+MEMORY_REPOSITORIES = {
+    ClientRepository: MemoryClientRepository,
+    MasterRepository: MemoryMasterRepository,
+    ServiceRepository: MemoryServiceRepository,
+    AppointmentRepository: MemoryAppointmentRepository,
+}
+
+memory_store = MemoryStore()
@@ -0,0 +1,36 @@
+from datetime import date
+from typing import Sequence
+
+from sqlalchemy import select, func, text, RowMapping
+from app.repositories.base import BaseRepository
+from app.database.models import Appointment as AppointmentModel
+
+ARCHIVE_TABLE = "Appointment_archive"
+
+
+class PartitionRepository(BaseRepository[AppointmentModel]):
+    async def create_partitions(self, date_from: date, date_to: date) -> int:
+        result = await self.db.execute(select(func.appointment_create_partitions(date_from, date_to)))
+        created = result.scalar_one()
+        await self.db.commit()
+        return created
+
+    async def archive_partitions(self, before: date) -> int:
+        result = await self.db.execute(select(func.appointment_archive_partitions(before)))
+        archived = result.scalar_one()
+        await self.db.commit()
+        return archived
+
+    async def get_partitions(self) -> Sequence[RowMapping]:
+        result = await self.db.execute(text(f"""
+            SELECT c.relname AS name,
+                   parent.relname = '{ARCHIVE_TABLE}' AS archived,
+                   pg_get_expr(c.relpartbound, c.oid) AS bounds,
+                   greatest(c.reltuples, 0)::bigint AS rows
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            WHERE i.inhparent IN ('"{self.model.__tablename__}"'::regclass, '"{ARCHIVE_TABLE}"'::regclass)
+            ORDER BY c.relname
+        """))
+        return result.mappings().all()
@@ -0,0 +1,45 @@
+from datetime import date
+from typing import Sequence
+
+from sqlalchemy import select, func, cast, Float, RowMapping
+from app.repositories.base import BaseRepository
+from app.database.models import AppointmentDailyStats as AppointmentDailyStatsModel
+
+
+class ReportRepository(BaseRepository[AppointmentDailyStatsModel]):
+    async def get_rollup(
+            self,
+            group_by: str,
+            date_from: date,
+            date_to: date,
+            master_id: int | None = None,
+            service_id: int | None = None
+    ) -> Sequence[RowMapping]:
+        key = {
+            "day": self.model.date,
+            "master": self.model.master_id,
+            "service": self.model.service_id,
+        }[group_by]
+        booked = func.sum(self.model.booked_count)
+        total = booked + func.sum(self.model.free_count)
+        query = (select(key,
+                        booked.label("booked_count"),
+                        func.sum(self.model.free_count).label("free_count"),
+                        func.sum(self.model.revenue).label("revenue"),
+                        func.sum(self.model.booked_minutes).label("booked_minutes"),
+                        func.coalesce(cast(booked, Float) / func.nullif(total, 0), 0).label("utilization"))
+                 .where(self.model.date >= date_from, self.model.date <= date_to)
+                 .group_by(key)
+                 .order_by(key))
+        if master_id is not None:
+            query = query.where(self.model.master_id == master_id)
+        if service_id is not None:
+            query = query.where(self.model.service_id == service_id)
+        result = await self.db.execute(query)
+        return result.mappings().all()
+
+    async def rebuild(self, date_from: date | None = None, date_to: date | None = None) -> int:
+        result = await self.db.execute(select(func.appointment_daily_stats_rebuild(date_from, date_to)))
+        rows = result.scalar_one()
+        await self.db.commit()
+        return rows
@@ -1,5 +1,4 @@
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
 from app.repositories.base import BaseRepository
 from app.database.models import Service as ServiceModel
 
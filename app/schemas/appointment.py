@@ -1,7 +1,10 @@
 from datetime import date, time
+from typing import Annotated, Literal
 
 from pydantic import BaseModel, Field
 
+BookingScope = Literal["upcoming", "past", "all"]
+
 
 class AppointmentCreate(BaseModel):
     date: date
@@ -25,8 +28,54 @@ class AppointmentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BookingResponse(AppointmentResponse):
+    master_name: str
+    master_surname: str
+    service_name: str
+    duration: time
+
 class AppointmentId(BaseModel):
     date: date
     start_time: time
     finish_time: time
-    master_id: int
\ No newline at end of file
+    master_id: int
+
+class FreeSlot(BaseModel):
+    appointment_id: int
+    master_id: int
+    date: date
+    start_time: time
+    finish_time: time
+
+class ScheduleTemplate(BaseModel):
+    master_id: int
+    service_id: int
+    weekdays: list[Annotated[int, Field(ge=0, le=6)]] = Field(..., min_length=1)
+    work_start: time
+    work_end: time
+    date_from: date
+    date_to: date
+    price: int | None = Field(None, ge=0)
+
+class ScheduleSlot(BaseModel):
+    date: date
+    start_time: time
+    finish_time: time
+
+class ScheduleResult(BaseModel):
+    created: int
+    skipped: int
+    skipped_slots: list[ScheduleSlot] = []
+
+class MasterScheduleEntry(AppointmentResponse):
+    booked: bool
+
+class MasterScheduleDay(BaseModel):
+    date: date
+    appointments: list[MasterScheduleEntry] = []
+
+class MasterSchedule(BaseModel):
+    master_id: int
+    date_from: date
+    date_to: date
+    days: list[MasterScheduleDay]
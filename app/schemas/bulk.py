@@ -0,0 +1,18 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+CsvEntityName = Literal["clients", "masters", "services", "appointments"]
+
+
+class ImportReject(BaseModel):
+    row: int
+    reason: str
+
+
+class ImportResult(BaseModel):
+    received: int
+    inserted: int
+    rejected: int
+    reasons: dict[str, int]
+    rejects: list[ImportReject]
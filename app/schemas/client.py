@@ -9,6 +9,9 @@ class ClientCreate(BaseModel):
     phone: str = Field(..., min_length=10, max_length=20, pattern=r"^\d+$")
     tg_id: Optional[str] = Field(None, max_length=50)
 
+class ClientTgIds(BaseModel):
+    tg_ids: list[str] = Field(..., min_length=1, max_length=1000)
+
 class ClientResponse(BaseModel):
     id: int
     name: str
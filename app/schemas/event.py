@@ -0,0 +1,27 @@
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel
+
+from app.schemas.appointment import AppointmentResponse
+
+SlotEventType = Literal["created", "booked", "freed", "deleted", "schedule"]
+
+
+class SlotEvent(BaseModel):
+    event: SlotEventType
+    master_id: int
+    date_from: date
+    date_to: date
+    appointment: AppointmentResponse | None = None
+    created: int | None = None
+
+    @classmethod
+    def for_appointment(cls, event: SlotEventType, appointment) -> "SlotEvent":
+        return cls(
+            event=event,
+            master_id=appointment.master_id,
+            date_from=appointment.date,
+            date_to=appointment.date,
+            appointment=AppointmentResponse.model_validate(appointment)
+        )
@@ -25,5 +25,16 @@ class MasterWithServices(MasterResponse):
 class MasterWithAppointments(MasterResponse):
     appointments: List[AppointmentResponse] = []
 
+class MasterServicePrice(BaseModel):
+    service_id: int
+    price: int
+
+class CatalogMaster(MasterResponse):
+    services: List[MasterServicePrice] = []
+
+class CatalogSnapshot(BaseModel):
+    services: List[ServiceResponse]
+    masters: List[CatalogMaster]
+
 class MasterId(BaseModel):
     master_phone: str
\ No newline at end of file
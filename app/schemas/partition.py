@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class AppointmentPartition(BaseModel):
+    name: str
+    archived: bool
+    bounds: str
+    rows: int
+
+
+class PartitionMaintenance(BaseModel):
+    created: int
+    archived: int
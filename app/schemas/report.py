@@ -0,0 +1,20 @@
+import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+ReportGroupBy = Literal["day", "master", "service"]
+
+
+class ReportRow(BaseModel):
+    date: datetime.date | None = None
+    master_id: int | None = None
+    service_id: int | None = None
+    booked_count: int
+    free_count: int
+    revenue: int
+    booked_minutes: int
+    utilization: float
+
+class RebuildResult(BaseModel):
+    rows: int
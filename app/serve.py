@@ -0,0 +1,55 @@
+import logging
+import os
+
+import uvicorn
+
+from app.database.connect import config
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    value = os.getenv("WEB_CONCURRENCY", "1")
+    if value == "auto":
+        return default_workers()
+    return int(value)
+
+
+def per_worker_state() -> list[str]:
+    state = []
+    if config.REPOSITORY_BACKEND == "memory":
+        state.append("REPOSITORY_BACKEND=memory (data)")
+    if config.CACHE_BACKEND == "memory":
+        state.append("CACHE_BACKEND=memory (catalog and client caches, ETag versions, replica stickiness)")
+    if config.EVENT_BROKER == "memory":
+        state.append("EVENT_BROKER=memory (slot events)")
+    return state
+
+
+def main() -> None:
+    workers = worker_count()
+    state = per_worker_state()
+    if workers > 1 and state:
+        logger.warning("%d workers do not share in-process state: %s", workers, "; ".join(state))
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        proxy_headers=True,
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+        access_log=os.getenv("ACCESS_LOG", "false").lower() in ("1", "true", "yes", "on"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import asyncio
+import base64
+import importlib
+import os
+from urllib.parse import urlencode
+
+SERVERLESS_DB_MODE = os.getenv("SERVERLESS_DB_MODE", "null")
+if SERVERLESS_DB_MODE == "single":
+    os.environ.setdefault("DB_POOL_SIZE", "1")
+    os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+    os.environ.setdefault("DB_POOL_PRE_PING", "true")
+else:
+    os.environ.setdefault("DB_NULLPOOL", "true")
+
+API_PREFIX = "/api/v1"
+ROUTERS = {
+    f"{API_PREFIX}/clients": "app.api.v1.clients",
+    f"{API_PREFIX}/admin": "app.api.v1.admin",
+}
+TEXT_CONTENT_TYPES = ("text/", "application/json", "application/x-ndjson", "application/xml")
+
+_app = None
+_loaded_routers: set[str] = set()
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_app():
+    global _app
+    if _app is None:
+        from fastapi import FastAPI
+        from fastapi.middleware.cors import CORSMiddleware
+        from app.api.v1.streaming import NEXT_CURSOR_HEADER
+
+        _app = FastAPI(
+            title="Beauty Salon API",
+            version="1.0.0",
+            docs_url=None,
+            redoc_url=None,
+            openapi_url=None
+        )
+        _app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+            expose_headers=[NEXT_CURSOR_HEADER]
+        )
+    return _app
+
+
+def load_router(path: str) -> None:
+    for prefix, module in ROUTERS.items():
+        if prefix not in _loaded_routers and path.startswith(prefix):
+            get_app().include_router(importlib.import_module(module).router, prefix=API_PREFIX)
+            _loaded_routers.add(prefix)
+
+
+def _event_path(event: dict) -> tuple[str, str]:
+    url = event.get("url") or event.get("path") or "/"
+    path, _, query = url.partition("?")
+    multi = event.get("multiValueQueryStringParameters")
+    if multi:
+        query = urlencode([(key, value) for key, values in multi.items() for value in values])
+    elif event.get("queryStringParameters"):
+        query = urlencode(event["queryStringParameters"])
+    return path or "/", query
+
+
+def _event_headers(event: dict) -> list[tuple[bytes, bytes]]:
+    multi = event.get("multiValueHeaders")
+    if multi:
+        pairs = [(key, value) for key, values in multi.items() for value in values]
+    else:
+        pairs = list((event.get("headers") or {}).items())
+    return [(key.lower().encode("latin-1"), str(value).encode("latin-1")) for key, value in pairs]
+
+
+def _event_body(event: dict) -> bytes:
+    body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        return base64.b64decode(body)
+    return body.encode()
+
+
+def build_scope(event: dict) -> dict:
+    path, query = _event_path(event)
+    headers = _event_headers(event)
+    host = dict(headers).get(b"host", b"localhost").decode("latin-1")
+    identity = (event.get("requestContext") or {}).get("identity") or {}
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": event.get("httpMethod", "GET").upper(),
+        "scheme": "https",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": (identity.get("sourceIp", "0.0.0.0"), 0),
+        "server": (host, 443),
+    }
+
+
+def _encode_response(status: int, headers: list[tuple[bytes, bytes]], body: bytes) -> dict:
+    multi: dict[str, list[str]] = {}
+    for key, value in headers:
+        multi.setdefault(key.decode("latin-1"), []).append(value.decode("latin-1"))
+    content_type = multi.get("content-type", [""])[0]
+    response = {
+        "statusCode": status,
+        "headers": {key: values[-1] for key, values in multi.items()},
+        "multiValueHeaders": multi,
+    }
+    if content_type.startswith(TEXT_CONTENT_TYPES):
+        try:
+            return response | {"body": body.decode(), "isBase64Encoded": False}
+        except UnicodeDecodeError:
+            pass
+    return response | {"body": base64.b64encode(body).decode(), "isBase64Encoded": True}
+
+
+async def handle(event: dict) -> dict:
+    scope = build_scope(event)
+    load_router(scope["path"])
+    request_body = _event_body(event)
+    received = False
+    finished = asyncio.Event()
+    started: dict = {}
+    chunks: list[bytes] = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            await finished.wait()
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": request_body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            started.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await get_app()(scope, receive, send)
+    return _encode_response(started["status"], started.get("headers", []), b"".join(chunks))
+
+
+def handler(event: dict, context=None) -> dict:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(handle(event))
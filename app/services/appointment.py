@@ -1,14 +1,35 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from app.core.events import EventBroker
+from app.core.versions import ResourceVersions, master_schedule
+from app.core.pagination import decode_date_cursor, encode_date_cursor
 from app.repositories.appointment import AppointmentRepository
+from app.repositories.base import (
+    DEFAULT_PAGE_SIZE, CHECK_VIOLATION, EXCLUSION_VIOLATION, FOREIGN_KEY_VIOLATION, sqlstate
+)
 from app.repositories.client import ClientRepository
 from app.repositories.master import MasterRepository
 from app.repositories.service import ServiceRepository
-from app.schemas.appointment import AppointmentCreate, AppointmentId
+from app.schemas.appointment import (
+    AppointmentCreate, AppointmentId, AppointmentResponse, FreeSlot, ScheduleTemplate, ScheduleSlot, ScheduleResult,
+    MasterSchedule, MasterScheduleDay, MasterScheduleEntry, BookingScope
+)
+from app.schemas.event import SlotEvent
+from app.services.availability import from_minutes, overlaps, to_minutes
 
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+MAX_AVAILABILITY_DAYS = 62
+MAX_SCHEDULE_DAYS = 366
+MAX_MASTER_SCHEDULE_DAYS = 62
 
 
 class AppointmentService:
-    def __init__(self, client_repo: ClientRepository, master_repo: MasterRepository, service_repo: ServiceRepository, appointment_repo: AppointmentRepository):
+    def __init__(self, client_repo: ClientRepository, master_repo: MasterRepository, service_repo: ServiceRepository, appointment_repo: AppointmentRepository, versions: ResourceVersions, events: EventBroker):
+        self.versions = versions
+        self.events = events
         self.master_repo = master_repo
         self.service_repo = service_repo
         self.appointment_repo = appointment_repo
@@ -24,71 +45,277 @@ class AppointmentService:
         return appointment.id
 
     async def create_slot(self, appointment_data: AppointmentCreate):
-        appointment = await self.appointment_repo.find_existing_slot(
-            appointment_data.date,
-            appointment_data.start_time,
-            appointment_data.finish_time,
-            appointment_data.master_id
-        )
-        if appointment:
+        found = await self.appointment_repo.check_exists({
+            self.master_repo.model: appointment_data.master_id,
+            self.service_repo.model: appointment_data.service_id,
+        })
+        if not found[self.master_repo.model]:
+            raise HTTPException(status_code=404, detail="Maстер не существует")
+        if not found[self.service_repo.model]:
+            raise HTTPException(status_code=404, detail="Услуга не существует")
+        try:
+            appointment = await self.appointment_repo.create(
+                **appointment_data.model_dump()
+            )
+        except IntegrityError as e:
+            if sqlstate(e) == EXCLUSION_VIOLATION:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Запись уже существует"
+                )
+            if sqlstate(e) == CHECK_VIOLATION:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Время окончания должно быть позже времени начала"
+                )
+            raise
+        await self.versions.bump(master_schedule(appointment.master_id))
+        await self.events.publish(SlotEvent.for_appointment("created", appointment))
+        return appointment
+
+    async def create_schedule(self, template: ScheduleTemplate) -> ScheduleResult:
+        if template.date_to < template.date_from or (template.date_to - template.date_from).days >= MAX_SCHEDULE_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Период расписания должен быть от 1 до {MAX_SCHEDULE_DAYS} дней"
+            )
+        if template.work_end <= template.work_start:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Запись уже существует"
+                detail="Время окончания должно быть позже времени начала"
             )
-        master = await self.master_repo.get_by_id(appointment_data.master_id)
+        master = await self.master_repo.get_by_id(template.master_id)
         if not master:
             raise HTTPException(status_code=404, detail="Maстер не существует")
-        service = await self.service_repo.get_by_id(appointment_data.service_id)
+        service = await self.service_repo.get_by_id(template.service_id)
         if not service:
             raise HTTPException(status_code=404, detail="Услуга не существует")
-        return await self.appointment_repo.create(
-            **appointment_data.model_dump()
-        )
+        price = template.price
+        if price is None:
+            price = await self.master_repo.get_service_price(template.master_id, template.service_id)
+        if price is None:
+            price = service.default_price
+
+        busy = defaultdict(list)
+        rows = await self.appointment_repo.get_busy_intervals([template.master_id], template.date_from, template.date_to)
+        for row in rows:
+            busy[row.date].append((to_minutes(row.start_time), to_minutes(row.finish_time)))
+
+        duration = to_minutes(service.duration)
+        work_start, work_end = to_minutes(template.work_start), to_minutes(template.work_end)
+        weekdays = set(template.weekdays)
+        new_rows, skipped = [], []
+        day = template.date_from
+        while day <= template.date_to:
+            if day.weekday() in weekdays:
+                start = work_start
+                while duration and start + duration <= work_end:
+                    slot = {
+                        "date": day,
+                        "start_time": from_minutes(start),
+                        "finish_time": from_minutes(start + duration),
+                    }
+                    if overlaps(busy.get(day, []), start, start + duration):
+                        skipped.append(ScheduleSlot(**slot))
+                    else:
+                        new_rows.append(slot | {
+                            "price": price,
+                            "client_id": 0,
+                            "master_id": template.master_id,
+                            "service_id": template.service_id,
+                        })
+                    start += duration
+            day += timedelta(days=1)
+
+        try:
+            created = await self.appointment_repo.create_many(new_rows)
+        except IntegrityError as e:
+            if sqlstate(e) == EXCLUSION_VIOLATION:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Расписание мастера изменилось во время создания, повторите запрос"
+                )
+            raise
+        if created:
+            await self.versions.bump(master_schedule(template.master_id))
+            await self.events.publish(SlotEvent(
+                event="schedule",
+                master_id=template.master_id,
+                date_from=new_rows[0]["date"],
+                date_to=new_rows[-1]["date"],
+                created=len(created)
+            ))
+        return ScheduleResult(created=len(created), skipped=len(skipped), skipped_slots=skipped)
 
     async def book_slot(self, client_id: int, appointment_id: int):
-        appointment = await self.appointment_repo.get_by_id(appointment_id)
-        if not appointment:
-            raise HTTPException(status_code=404, detail="Записи не существует")
-        client = await self.client_repo.get_by_id(client_id)
-        if not client:
+        if client_id <= 0:
             raise HTTPException(status_code=404, detail="Клиент не найден")
-
-        if appointment.client_id > 0:
-            if appointment.client_id == client_id:
+        try:
+            appointment, previous_client_id = await self.appointment_repo.book(appointment_id, client_id)
+        except IntegrityError as e:
+            if sqlstate(e) == FOREIGN_KEY_VIOLATION:
+                raise HTTPException(status_code=404, detail="Клиент не найден")
+            raise
+        if previous_client_id is None:
+            raise HTTPException(status_code=404, detail="Записи не существует")
+        if appointment is None:
+            if previous_client_id == client_id:
                 raise HTTPException(status_code=400, detail="Вы уже записаны")
             raise HTTPException(status_code=400, detail="Слот занят")
-
-        appointment.client_id = client_id
-        await self.appointment_repo.db.commit()
-        await self.appointment_repo.db.refresh(appointment)
+        await self.versions.bump(master_schedule(appointment.master_id))
+        await self.events.publish(SlotEvent.for_appointment("booked", appointment))
         return appointment
 
-    async def unlink_client_from_appointment(self, client_id, appointment_id: int):
-        client = await self.client_repo.get_by_id(client_id)
-        if not client:
+    async def unlink_client_from_appointment(self, client_id: int, appointment_id: int):
+        if client_id <= 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Клиента с таким ID не существует")
-        appointment = await self.appointment_repo.get_by_id(appointment_id)
-        if not appointment:
+        appointment, previous_client_id = await self.appointment_repo.unbook(appointment_id, client_id)
+        if previous_client_id is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Записи с таким ID не существует")
-        if appointment.client_id == client_id:
-            appointment.client_id = 0
-            await self.appointment_repo.db.commit()
-            await self.appointment_repo.db.refresh(appointment)
-            return appointment
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Отмена невозможна, клиент не записан на эту услугу")
+        if appointment is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Отмена невозможна, клиент не записан на эту услугу")
+        await self.versions.bump(master_schedule(appointment.master_id))
+        await self.events.publish(SlotEvent.for_appointment("freed", appointment))
+        return appointment
 
     async def delete_appointment(self, appointment_id):
         appointment = await self.appointment_repo.delete(appointment_id)
         if not appointment:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Услуги не существует")
+        await self.versions.bump(master_schedule(appointment.master_id))
+        await self.events.publish(SlotEvent.for_appointment("deleted", appointment))
         return appointment
 
-    async def get_clients_appointments(self, client_id):
-        client = await self.client_repo.get_by_id(client_id)
-        if not client:
+    async def get_clients_appointments(self, client_id: int, scope: BookingScope = "all"):
+        rows = await self.appointment_repo.get_client_bookings(
+            self.appointment_repo.columns_for(AppointmentResponse), client_id, scope, datetime.now()
+        )
+        if not rows:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Клиента с таким ID не существует")
-        return await self.appointment_repo.get_clients_appointments(client_id)
+        return [row for row in rows if row["id"] is not None]
+
+    async def get_master_schedule(self, master_id: int, date_from: date, date_to: date) -> MasterSchedule:
+        if date_to < date_from or (date_to - date_from).days >= MAX_MASTER_SCHEDULE_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Период расписания должен быть от 1 до {MAX_MASTER_SCHEDULE_DAYS} дней"
+            )
+        found = await self.appointment_repo.check_exists({self.master_repo.model: master_id})
+        if not found[self.master_repo.model]:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мастер не существует")
+        rows = await self.appointment_repo.get_master_schedule(
+            self.appointment_repo.columns_for(AppointmentResponse), master_id, date_from, date_to
+        )
+        days = {}
+        day = date_from
+        while day <= date_to:
+            days[day] = MasterScheduleDay(date=day)
+            day += timedelta(days=1)
+        for row in rows:
+            days[row["date"]].appointments.append(MasterScheduleEntry(**row, booked=row["client_id"] != 0))
+        return MasterSchedule(master_id=master_id, date_from=date_from, date_to=date_to, days=list(days.values()))
+
+    async def get_all_appointments(
+            self,
+            cursor: str | None = None,
+            limit: int = DEFAULT_PAGE_SIZE,
+            master_id: int | None = None,
+            client_id: int | None = None,
+            date_from: date | None = None,
+            date_to: date | None = None,
+            free: bool | None = None
+    ):
+        filters = self.appointment_repo.build_filters(master_id, client_id, date_from, date_to, free)
+        rows = await self.appointment_repo.get_rows_page_by_date(
+            self.appointment_repo.columns_for(AppointmentResponse),
+            *filters,
+            after=decode_date_cursor(cursor),
+            limit=limit
+        )
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_date_cursor(last["date"], last["id"])
+        return rows, next_cursor
+
+    def stream_appointments(
+            self,
+            master_id: int | None = None,
+            client_id: int | None = None,
+            date_from: date | None = None,
+            date_to: date | None = None,
+            free: bool | None = None
+    ):
+        filters = self.appointment_repo.build_filters(master_id, client_id, date_from, date_to, free)
+        return self.appointment_repo.stream_rows_by_date(
+            self.appointment_repo.columns_for(AppointmentResponse),
+            *filters
+        )
+
+    async def _load_availability(
+            self,
+            service_id: int,
+            date_from: date,
+            date_to: date,
+            day_start: time | None,
+            day_end: time | None,
+            master_id: int | None
+    ):
+        if date_to < date_from or (date_to - date_from).days >= MAX_AVAILABILITY_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Период поиска должен быть от 1 до {MAX_AVAILABILITY_DAYS} дней"
+            )
+        service = await self.service_repo.get_by_id(service_id)
+        if not service:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Услуга не существует")
+        master_ids = await self.master_repo.get_ids_by_service(service_id, master_id)
+        now = datetime.now()
+        date_from = max(date_from, now.date())
+        if not master_ids or date_to < date_from:
+            return []
+        rows = await self.appointment_repo.get_free_intervals(master_ids, service_id, date_from, date_to)
+        duration = to_minutes(service.duration)
+        return [
+            row for row in rows
+            if to_minutes(row.finish_time) - to_minutes(row.start_time) >= duration
+            and (row.date > now.date() or row.start_time >= now.time())
+            and (day_start is None or row.start_time >= day_start)
+            and (day_end is None or row.finish_time <= day_end)
+        ]
+
+    @staticmethod
+    def _free_slot(row) -> FreeSlot:
+        return FreeSlot(
+            appointment_id=row.id,
+            master_id=row.master_id,
+            date=row.date,
+            start_time=row.start_time,
+            finish_time=row.finish_time
+        )
+
+    async def get_free_slots(
+            self,
+            service_id: int,
+            date_from: date,
+            date_to: date,
+            day_start: time | None = None,
+            day_end: time | None = None,
+            master_id: int | None = None
+    ) -> list[FreeSlot]:
+        rows = await self._load_availability(service_id, date_from, date_to, day_start, day_end, master_id)
+        return [self._free_slot(row) for row in rows]
 
-    async def get_all_appointments(self):
-        appointments = await self.appointment_repo.get_all()
-        return appointments
+    async def get_earliest_free_slot(
+            self,
+            service_id: int,
+            date_from: date,
+            date_to: date,
+            day_start: time | None = None,
+            day_end: time | None = None,
+            master_id: int | None = None
+    ) -> FreeSlot:
+        rows = await self._load_availability(service_id, date_from, date_to, day_start, day_end, master_id)
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Свободных окон нет")
+        return self._free_slot(rows[0])
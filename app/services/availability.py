@@ -0,0 +1,15 @@
+from bisect import bisect_left
+from datetime import time
+
+
+def to_minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(value: int) -> time:
+    return time(value // 60, value % 60)
+
+
+def overlaps(busy: list[tuple[int, int]], start: int, end: int) -> bool:
+    index = bisect_left(busy, (end,))
+    return index > 0 and busy[index - 1][1] > start
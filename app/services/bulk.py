@@ -0,0 +1,95 @@
+import csv
+from datetime import date
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+
+from app.core.cache import Cache
+from app.core.versions import ResourceVersions, master_schedule
+from app.repositories.bulk import BulkRepository, CsvFormatError, ENTITIES
+from app.schemas.bulk import CsvEntityName, ImportResult
+
+
+class BulkService:
+    def __init__(self, bulk_repo: BulkRepository, client_cache: Cache, catalog_cache: Cache, versions: ResourceVersions):
+        self.bulk_repo = bulk_repo
+        self.client_cache = client_cache
+        self.catalog_cache = catalog_cache
+        self.versions = versions
+
+    async def _read_header(self, chunks: AsyncIterator[bytes]) -> tuple[list[str], bytes]:
+        buffer = b""
+        async for chunk in chunks:
+            buffer += chunk
+            if b"\n" in buffer:
+                break
+        line, _, rest = buffer.partition(b"\n")
+        try:
+            header = next(csv.reader([line.decode("utf-8-sig")]), [])
+        except UnicodeDecodeError:
+            header = []
+        return [column.strip().lower() for column in header], rest
+
+    async def import_csv(self, entity_name: CsvEntityName, chunks: AsyncIterator[bytes]) -> ImportResult:
+        entity = ENTITIES[entity_name]
+        columns, rest = await self._read_header(chunks)
+        if not any(columns):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Файл должен начинаться со строки заголовка"
+            )
+        unknown = [column for column in columns if column not in entity.columns]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестные колонки: {', '.join(unknown)}"
+            )
+        missing = [column for column in entity.required if column not in columns]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Не хватает колонок: {', '.join(missing)}"
+            )
+        if len(set(columns)) != len(columns):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Колонки в заголовке не должны повторяться"
+            )
+
+        async def body():
+            if rest:
+                yield rest
+            async for chunk in chunks:
+                yield chunk
+
+        try:
+            result = await self.bulk_repo.import_csv(entity, columns, body())
+        except CsvFormatError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Некорректный CSV: {e}"
+            )
+
+        if result["inserted"]:
+            await self._invalidate(entity_name, result["master_ids"])
+        return ImportResult(**result)
+
+    async def _invalidate(self, entity_name: CsvEntityName, master_ids: list[int]) -> None:
+        if entity_name == "clients":
+            await self.client_cache.invalidate("tg:")
+        elif entity_name == "masters":
+            await self.catalog_cache.invalidate("masters:", "snapshot")
+            await self.versions.bump("masters")
+        elif entity_name == "services":
+            await self.catalog_cache.invalidate("services:", "snapshot")
+            await self.versions.bump("services")
+        else:
+            await self.versions.bump(*(master_schedule(master_id) for master_id in master_ids))
+
+    def export_csv(self, entity_name: CsvEntityName, date_from: date | None = None, date_to: date | None = None) -> AsyncIterator[bytes]:
+        if date_from is not None and date_to is not None and date_to < date_from:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Дата окончания должна быть не раньше даты начала"
+            )
+        return self.bulk_repo.copy_out(self.bulk_repo.export_query(ENTITIES[entity_name], date_from, date_to))
@@ -1,11 +1,16 @@
 from fastapi import HTTPException, status
+
+from app.core.cache import Cache
+from app.core.pagination import decode_id_cursor, encode_id_cursor
+from app.repositories.base import DEFAULT_PAGE_SIZE
 from app.repositories.client import ClientRepository
-from app.schemas.client import ClientCreate
+from app.schemas.client import ClientCreate, ClientResponse
 
 
 class ClientService:
-    def __init__(self, client_repo: ClientRepository):
+    def __init__(self, client_repo: ClientRepository, cache: Cache):
         self.client_repo = client_repo
+        self.cache = cache
 
     async def create_client(self, client_data: ClientCreate):
         existing_client = await self.client_repo.get_by_phone_or_tg_id(
@@ -19,14 +24,45 @@ class ClientService:
                 detail="Клиент с таким телефоном или Telegram ID уже существует"
             )
 
-        return await self.client_repo.create(**client_data.model_dump())
+        client = await self.client_repo.create(**client_data.model_dump())
+        if client.tg_id is not None:
+            await self.cache.discard(f"tg:{client.tg_id}")
+        return client
+
+    async def get_all_clients(self, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+        rows = await self.client_repo.get_rows_page(
+            self.client_repo.columns_for(ClientResponse),
+            *self.client_repo.build_filters(),
+            after_id=decode_id_cursor(cursor),
+            limit=limit
+        )
+        next_cursor = encode_id_cursor(rows[-1]["id"]) if len(rows) == limit else None
+        return rows, next_cursor
 
-    async def get_all_clients(self):
-        clients = await self.client_repo.get_all()
-        return [client for client in clients if client.id != 0]
+    async def search_clients(self, query_text: str, limit: int):
+        query_text = query_text.strip()
+        if not query_text:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Пустой поисковый запрос"
+            )
+        return await self.client_repo.search(self.client_repo.columns_for(ClientResponse), query_text, limit)
+
+    def stream_clients(self):
+        return self.client_repo.stream_rows(
+            self.client_repo.columns_for(ClientResponse),
+            *self.client_repo.build_filters()
+        )
+
+    async def _resolve_tg_id(self, tg_id: str) -> ClientResponse | None:
+        async def load():
+            client = await self.client_repo.get_by_tg_id(tg_id)
+            return ClientResponse.model_validate(client) if client else None
+
+        return await self.cache.get_or_load(f"tg:{tg_id}", load)
 
     async def get_client_by_tg_id(self, tg_id: str):
-        client = await self.client_repo.get_by_tg_id(tg_id)
+        client = await self._resolve_tg_id(tg_id)
         if not client:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -35,7 +71,7 @@ class ClientService:
         return client
 
     async def get_client_id_by_tg_id(self, tg_id: str):
-        client = await self.client_repo.get_by_tg_id(tg_id)
+        client = await self._resolve_tg_id(tg_id)
         if not client:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -43,6 +79,14 @@ class ClientService:
             )
         return client.id
 
+    async def get_clients_by_tg_ids(self, tg_ids: list[str]) -> list[ClientResponse]:
+        async def load(missing):
+            clients = await self.client_repo.get_by_tg_ids(missing)
+            return {client.tg_id: ClientResponse.model_validate(client) for client in clients}
+
+        found = await self.cache.get_many_or_load("tg:", tg_ids, load)
+        return [client for client in found.values() if client is not None]
+
     async def get_client_by_id(self, client_id: int):
         client = await self.client_repo.get_by_id(client_id)
         if not client or client.id == 0:
@@ -1,14 +1,24 @@
 from fastapi import HTTPException, status
 
+from app.core.cache import Cache
+from app.core.versions import ResourceVersions
+from app.core.pagination import decode_id_cursor, encode_id_cursor
+from app.repositories.base import DEFAULT_PAGE_SIZE
+
 from app.repositories.master import MasterRepository
 from app.repositories.service import ServiceRepository
-from app.schemas.master import MasterCreate, MasterId
+from app.schemas.master import (
+    MasterCreate, MasterId, MasterResponse, MasterWithServices, CatalogMaster, CatalogSnapshot, MasterServicePrice
+)
+from app.schemas.service import ServiceResponse
 
 
 class MasterService:
-    def __init__(self, master_repo: MasterRepository, service_repo: ServiceRepository):
+    def __init__(self, master_repo: MasterRepository, service_repo: ServiceRepository, cache: Cache, versions: ResourceVersions):
         self.master_repo = master_repo
         self.service_repo = service_repo
+        self.cache = cache
+        self.versions = versions
 
     async def create_master(self, master_data: MasterCreate):
         master = await self.master_repo.get_by_phone(master_data.phone)
@@ -17,16 +27,22 @@ class MasterService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Мастер с таким телефоном уже существует"
             )
-        return await self.master_repo.create(**master_data.model_dump())
+        master = await self.master_repo.create(**master_data.model_dump())
+        await self.cache.invalidate("masters:", "snapshot")
+        await self.versions.bump("masters")
+        return master
 
     async def get_master_by_id(self, master_id: int):
-        master = await self.master_repo.get_by_id(master_id)
-        if not master:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Мастер не существует"
-            )
-        return master
+        async def load():
+            master = await self.master_repo.get_by_id(master_id)
+            if not master:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Мастер не существует"
+                )
+            return MasterResponse.model_validate(master)
+
+        return await self.cache.get_or_load(f"masters:{master_id}", load)
 
     async def get_master_id_by_master_data(self, master_data: MasterId):
         master = await self.master_repo.get_by_phone(**master_data.model_dump())
@@ -38,39 +54,63 @@ class MasterService:
         return master.id
 
     async def add_service_to_master(self, master_id: int, service_id: int):
-        master = await self.master_repo.get_with_services(master_id)
-        if not master:
+        master_exists, service_exists, linked = await self.master_repo.get_service_link_state(master_id, service_id)
+        if not master_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Мастер не существует"
             )
-        service = await self.service_repo.get_by_id(service_id)
-        if not service:
+        if not service_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Услуга не существует"
             )
-        if service in master.services:
+        if linked:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Услуга уже есть у мастера"
             )
-        master.services.append(service)
-        await self.master_repo.db.commit()
-        await self.master_repo.db.refresh(master)
-        return master
+        await self.master_repo.add_service(master_id, service_id)
+        await self.cache.invalidate(f"masters:{master_id}:", "snapshot")
+        await self.versions.bump("masters")
+        return await self.master_repo.get_with_services(master_id)
+
+    async def get_all_masters(self, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+        async def load():
+            masters = await self.master_repo.get_page(after_id=decode_id_cursor(cursor), limit=limit)
+            next_cursor = encode_id_cursor(masters[-1].id) if len(masters) == limit else None
+            return [MasterResponse.model_validate(master) for master in masters], next_cursor
 
-    async def get_all_masters(self):
-        return await self.master_repo.get_all()
+        return await self.cache.get_or_load(f"masters:{cursor}:{limit}", load)
 
     async def get_master_with_services(self, master_id: int):
-        master = await self.master_repo.get_with_services(master_id)
-        if not master:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Мастер не существует"
+        async def load():
+            master = await self.master_repo.get_with_services(master_id)
+            if not master:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Мастер не существует"
+                )
+            return MasterWithServices.model_validate(master)
+
+        return await self.cache.get_or_load(f"masters:{master_id}:services", load)
+
+    async def get_catalog(self) -> CatalogSnapshot:
+        async def load():
+            masters = {}
+            for row in await self.master_repo.get_catalog_rows(self.master_repo.columns_for(MasterResponse)):
+                master = masters.get(row["id"])
+                if master is None:
+                    master = masters[row["id"]] = CatalogMaster(**{name: row[name] for name in MasterResponse.model_fields})
+                if row["service_id"] is not None:
+                    master.services.append(MasterServicePrice(service_id=row["service_id"], price=row["price"]))
+            services = await self.service_repo.get_all()
+            return CatalogSnapshot(
+                services=[ServiceResponse.model_validate(service) for service in services],
+                masters=list(masters.values())
             )
-        return master
+
+        return await self.cache.get_or_load("snapshot", load)
 
     async def get_master_with_appointments(self, master_id: int):
         master = await self.master_repo.get_with_appointments(master_id)
@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from app.repositories.partition import PartitionRepository
+from app.schemas.partition import AppointmentPartition, PartitionMaintenance
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionService:
+    def __init__(self, partition_repo: PartitionRepository):
+        self.partition_repo = partition_repo
+
+    async def maintain(self, ahead_months: int, retention_months: int, today: date | None = None) -> PartitionMaintenance:
+        month = (today or date.today()).replace(day=1)
+        created = await self.partition_repo.create_partitions(
+            month, add_months(month, ahead_months + 1) - timedelta(days=1)
+        )
+        archived = 0
+        if retention_months > 0:
+            archived = await self.partition_repo.archive_partitions(add_months(month, -retention_months))
+        return PartitionMaintenance(created=created, archived=archived)
+
+    async def get_partitions(self) -> list[AppointmentPartition]:
+        return [AppointmentPartition(**row) for row in await self.partition_repo.get_partitions()]
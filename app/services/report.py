@@ -0,0 +1,37 @@
+from datetime import date
+
+from fastapi import HTTPException, status
+
+from app.repositories.report import ReportRepository
+from app.schemas.report import ReportGroupBy, ReportRow, RebuildResult
+
+MAX_REPORT_DAYS = 366
+
+
+class ReportService:
+    def __init__(self, report_repo: ReportRepository):
+        self.report_repo = report_repo
+
+    async def get_report(
+            self,
+            group_by: ReportGroupBy,
+            date_from: date,
+            date_to: date,
+            master_id: int | None = None,
+            service_id: int | None = None
+    ) -> list[ReportRow]:
+        if date_to < date_from or (date_to - date_from).days >= MAX_REPORT_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Период отчёта должен быть от 1 до {MAX_REPORT_DAYS} дней"
+            )
+        rows = await self.report_repo.get_rollup(group_by, date_from, date_to, master_id, service_id)
+        return [ReportRow(**row) for row in rows]
+
+    async def rebuild(self, date_from: date | None = None, date_to: date | None = None) -> RebuildResult:
+        if date_from is not None and date_to is not None and date_to < date_from:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Дата окончания должна быть не раньше даты начала"
+            )
+        return RebuildResult(rows=await self.report_repo.rebuild(date_from, date_to))
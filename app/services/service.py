@@ -1,14 +1,20 @@
+from app.core.cache import Cache
+from app.core.versions import ResourceVersions
+from app.core.pagination import decode_id_cursor, encode_id_cursor
+from app.repositories.base import DEFAULT_PAGE_SIZE
 from app.repositories.service import ServiceRepository
 
 from fastapi import HTTPException, status
 
-from app.schemas.service import ServiceId
+from app.schemas.service import ServiceId, ServiceResponse
 from app.schemas.service import ServiceCreate
 
 
 class ServiceService:
-    def __init__(self, service_repo: ServiceRepository):
+    def __init__(self, service_repo: ServiceRepository, cache: Cache, versions: ResourceVersions):
         self.service_repo = service_repo
+        self.cache = cache
+        self.versions = versions
 
     async def create_service(self, service_data: ServiceCreate):
         service = await self.service_repo.get_by_info(
@@ -21,7 +27,10 @@ class ServiceService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Услуга уже существует"
             )
-        return await self.service_repo.create(**service_data.model_dump())
+        service = await self.service_repo.create(**service_data.model_dump())
+        await self.cache.invalidate("services:", "snapshot")
+        await self.versions.bump("services")
+        return service
 
     async def get_service(self, service_id):
         service = await self.service_repo.get_by_id(service_id)
@@ -41,5 +50,10 @@ class ServiceService:
             )
         return service.id
 
-    async def get_all_services(self):
-        return await self.service_repo.get_all()
\ No newline at end of file
+    async def get_all_services(self, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+        async def load():
+            services = await self.service_repo.get_page(after_id=decode_id_cursor(cursor), limit=limit)
+            next_cursor = encode_id_cursor(services[-1].id) if len(services) == limit else None
+            return [ServiceResponse.model_validate(service) for service in services], next_cursor
+
+        return await self.cache.get_or_load(f"services:{cursor}:{limit}", load)
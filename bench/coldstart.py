@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app.serverless as serverless
+imported = time.perf_counter()
+response = serverless.handler({{"httpMethod": "GET", "url": {path!r}, "headers": {{"Host": "localhost"}}}})
+finished = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (finished - imported) * 1000,
+    "status": response["statusCode"],
+}}))
+"""
+
+DB_DEFAULTS = {
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "postgres",
+}
+
+
+def probe(path: str) -> tuple[dict, list[tuple[int, str]]]:
+    env = DB_DEFAULTS | os.environ
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(path=path)],
+        capture_output=True, text=True, env=env, check=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.strip()))
+    return json.loads(result.stdout.strip().splitlines()[-1]), imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Время холодного старта serverless-обработчика")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/v1/clients/masters/cold-start",
+                        help="запрос, который проходит роутер, но не обращается к БД")
+    parser.add_argument("--budget-ms", type=float, default=1500,
+                        help="допустимая медиана импорта и первого запроса")
+    parser.add_argument("--top", type=int, default=15, help="сколько самых долгих импортов показать")
+    args = parser.parse_args()
+
+    runs = []
+    imports = []
+    for _ in range(args.runs):
+        run, imports = probe(args.path)
+        runs.append(run)
+
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    request_ms = statistics.median(run["first_request_ms"] for run in runs)
+    total_ms = statistics.median(run["import_ms"] + run["first_request_ms"] for run in runs)
+    print(f"status            {runs[-1]['status']}")
+    print(f"import            {import_ms:8.1f} ms")
+    print(f"first request     {request_ms:8.1f} ms")
+    print(f"total             {total_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print()
+    print(f"{'cumulative ms':>14}  module")
+    for cumulative, name in sorted(imports, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:>14.1f}  {name}")
+
+    if total_ms > args.budget_ms:
+        print(f"\nХолодный старт {total_ms:.0f} ms превышает бюджет {args.budget_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
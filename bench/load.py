@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import aiohttp
+
+API = "/api/v1"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, session: aiohttp.ClientSession, name: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            async with session.request(method, API + path, **kwargs) as response:
+                body = await response.read()
+                status = response.status
+        except aiohttp.ClientError:
+            self.errors[name] += 1
+            return None, None
+        self.latencies[name].append(time.perf_counter() - started)
+        if status >= 500:
+            self.errors[name] += 1
+        return status, body
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(q / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    results = {}
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        values = sorted(recorder.latencies[name])
+        results[name] = {
+            "count": len(values),
+            "errors": recorder.errors[name],
+            "rps": len(values) / elapsed if elapsed else 0.0,
+            "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000 if values else 0.0,
+        }
+    return results
+
+
+async def load_fixtures(session: aiohttp.ClientSession) -> dict:
+    async def get(path: str, **params):
+        async with session.get(API + path, params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    return {
+        "clients": await get("/clients/", limit=1000),
+        "masters": await get("/clients/masters", limit=1000),
+        "services": await get("/clients/services", limit=1000),
+        "free": await get("/clients/appointments", limit=1000, free="true", date_from=date.today().isoformat()),
+    }
+
+
+async def booking_storm(session, recorder: Recorder, fixtures: dict, rnd: random.Random):
+    appointment = rnd.choice(fixtures["free"])
+    client = rnd.choice(fixtures["clients"])
+    status, _ = await recorder.call(
+        session, "POST /clients/{client_id}/appointments/{appointment_id}", "POST",
+        f"/clients/{client['id']}/appointments/{appointment['id']}"
+    )
+    if status == 200:
+        await recorder.call(
+            session, "POST /clients/{client_id}/appointment/{appointment_id}", "POST",
+            f"/clients/{client['id']}/appointment/{appointment['id']}"
+        )
+
+
+async def catalog_browsing(session, recorder: Recorder, fixtures: dict, rnd: random.Random):
+    await recorder.call(session, "GET /clients/services", "GET", "/clients/services")
+    await recorder.call(session, "GET /clients/masters", "GET", "/clients/masters")
+    if fixtures["masters"]:
+        master = rnd.choice(fixtures["masters"])
+        await recorder.call(session, "GET /clients/masters/{id}", "GET", f"/clients/masters/{master['id']}")
+        await recorder.call(session, "GET /clients/masters/{id}/services", "GET",
+                            f"/clients/masters/{master['id']}/services", params={"master_id": master["id"]})
+    if fixtures["services"]:
+        service = rnd.choice(fixtures["services"])
+        await recorder.call(session, "GET /clients/services/{service_id}/availability/earliest", "GET",
+                            f"/clients/services/{service['id']}/availability/earliest")
+
+
+async def client_lookup(session, recorder: Recorder, fixtures: dict, rnd: random.Random):
+    if rnd.random() < 0.1 or not fixtures["clients"]:
+        tg_id = f"unknown{rnd.randrange(1_000_000)}"
+    else:
+        tg_id = rnd.choice(fixtures["clients"])["tg_id"]
+    await recorder.call(session, "GET /clients/by_tg_id/{tg_id}", "GET", f"/clients/by_tg_id/{tg_id}")
+    await recorder.call(session, "POST /clients/client_id", "POST", "/clients/client_id", params={"tg_id": tg_id})
+
+
+async def admin_bulk(session, recorder: Recorder, fixtures: dict, rnd: random.Random):
+    date_from = date.today() + timedelta(days=rnd.randrange(400, 4000))
+    await recorder.call(session, "POST /admin/appointments/bulk", "POST", "/admin/appointments/bulk", json={
+        "master_id": rnd.choice(fixtures["masters"])["id"],
+        "service_id": rnd.choice(fixtures["services"])["id"],
+        "weekdays": [0, 1, 2, 3, 4],
+        "work_start": "09:00",
+        "work_end": "18:00",
+        "date_from": date_from.isoformat(),
+        "date_to": (date_from + timedelta(days=30)).isoformat(),
+    })
+
+
+SCENARIOS = {
+    "booking_storm": booking_storm,
+    "catalog_browsing": catalog_browsing,
+    "client_lookup": client_lookup,
+    "admin_bulk": admin_bulk,
+}
+
+REQUIRED_FIXTURES = {
+    "booking_storm": ["free", "clients"],
+    "admin_bulk": ["masters", "services"],
+}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    recorder = Recorder()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(args.base_url, connector=connector) as session:
+        fixtures = await load_fixtures(session)
+        scenarios = []
+        for name in args.scenarios:
+            missing = [key for key in REQUIRED_FIXTURES.get(name, []) if not fixtures[key]]
+            if missing:
+                print(f"{name}: пропущен, нет данных: {', '.join(missing)}")
+                continue
+            scenarios.append(SCENARIOS[name])
+        if not scenarios:
+            raise SystemExit("Ни один сценарий не может выполняться на этих данных")
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(index: int):
+            rnd = random.Random(args.seed + index)
+            while time.perf_counter() < deadline:
+                await rnd.choice(scenarios)(session, recorder, fixtures, rnd)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "scenarios": args.scenarios,
+            "concurrency": args.concurrency,
+            "duration_seconds": elapsed,
+            "python": platform.python_version(),
+            "label": args.label,
+        },
+        "results": summarize(recorder, elapsed),
+    }
+
+
+def print_results(report: dict) -> None:
+    print(f"{'endpoint':<62} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, row in report["results"].items():
+        print(f"{name:<62} {row['count']:>7} {row['errors']:>5} {row['rps']:>8.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    with open(candidate_path) as f:
+        candidate = json.load(f)["results"]
+    print(f"{'endpoint':<62} {'rps':>16} {'p95 ms':>18} {'p99 ms':>18}")
+    for name in sorted(set(baseline) | set(candidate)):
+        old, new = baseline.get(name), candidate.get(name)
+        if not old or not new:
+            print(f"{name:<62} {'только в ' + ('baseline' if old else 'candidate'):>16}")
+            continue
+        print(f"{name:<62} {old['rps']:>7.1f}->{new['rps']:<8.1f} "
+              f"{old['p95_ms']:>8.2f}->{new['p95_ms']:<8.2f} {old['p99_ms']:>8.2f}->{new['p99_ms']:<8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочные сценарии для API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--duration", type=float, default=30)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--label", default="")
+    run_parser.add_argument("--output", help="файл для JSON-отчёта")
+
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args.baseline, args.candidate)
+        return
+    report = asyncio.run(run(args))
+    print_results(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
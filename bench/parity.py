@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date, timedelta
+
+import aiohttp
+
+from bench.seed import connect
+
+API = "/api/v1"
+
+
+def day(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+class Session:
+    def __init__(self, http: aiohttp.ClientSession, url: str):
+        self.http = http
+        self.url = url
+        self.steps: list[dict] = []
+
+    async def call(self, name: str, method: str, path: str, **kwargs) -> dict:
+        async with self.http.request(method, API + path, **kwargs) as response:
+            text = await response.text()
+            content_type = response.headers.get("Content-Type", "")
+            step = {
+                "name": name,
+                "status": response.status,
+                "body": json.loads(text) if content_type.startswith("application/json") else text,
+                "cursor": response.headers.get("X-Next-Cursor"),
+            }
+        self.steps.append(step)
+        return step
+
+    async def create(self, name: str, path: str, json: dict) -> int:
+        step = await self.call(name, "POST", path, json=json)
+        if step["status"] != 201:
+            raise SystemExit(f"{self.url}: {name} вернул {step['status']} {step['body']}, "
+                             f"база или хранилище в памяти не пустые")
+        return step["body"]["id"]
+
+
+async def scenario(s: Session) -> None:
+    for i, (name, phone, tg_id) in enumerate([
+        ("Анна", "79990000001", "tg1"), ("Андрей", "79990000002", "tg2"),
+        ("Борис", "79991110003", "tg3"), ("Анастасия", "79990000004", "tg4"),
+    ]):
+        await s.call("client", "POST", "/clients/", json={
+            "name": name, "surname": "Иванова" if i % 2 == 0 else None, "phone": phone, "tg_id": tg_id
+        })
+    await s.call("client duplicate phone", "POST", "/clients/", json={"name": "X", "phone": "79990000001", "tg_id": "tgX"})
+    await s.call("client duplicate tg", "POST", "/clients/", json={"name": "X", "phone": "79990000009", "tg_id": "tg2"})
+
+    m1 = await s.create("master", "/admin/masters", {"name": "М", "surname": "Один", "phone": "70000000001"})
+    m2 = await s.create("master", "/admin/masters", {"name": "М", "surname": "Два", "phone": "70000000002"})
+    await s.call("master duplicate", "POST", "/admin/masters", json={"name": "М", "surname": "Три", "phone": "70000000001"})
+    s1 = await s.create("service", "/admin/services", {
+        "name": "Стрижка", "duration": "01:00", "description": "d", "default_price": 1000
+    })
+    s2 = await s.create("service", "/admin/services", {
+        "name": "Укладка", "duration": "00:30", "description": "u", "default_price": 500
+    })
+    for master_id, service_id in [(m1, s1), (m1, s2), (m2, s1), (m1, s1), (999, s1), (m1, 999)]:
+        await s.call("link", "POST", f"/admin/masters/{master_id}/services/{service_id}")
+
+    slot = {"date": day(3), "price": 100, "master_id": m1, "service_id": s1}
+    a1 = await s.create("slot", "/admin/appointments", slot | {"start_time": "10:00", "finish_time": "11:00"})
+    await s.call("slot overlap", "POST", "/admin/appointments", json=slot | {"start_time": "10:30", "finish_time": "11:30"})
+    await s.call("slot adjacent", "POST", "/admin/appointments", json=slot | {"start_time": "11:00", "finish_time": "11:30", "service_id": s2})
+    await s.call("slot time order", "POST", "/admin/appointments", json=slot | {"start_time": "12:00", "finish_time": "11:30"})
+    await s.call("slot unknown master", "POST", "/admin/appointments", json=slot | {"start_time": "12:00", "finish_time": "13:30", "master_id": 999})
+    await s.call("slot past", "POST", "/admin/appointments", json=slot | {"date": day(-3), "start_time": "15:00", "finish_time": "16:30"})
+    await s.call("schedule", "POST", "/admin/appointments/bulk", json={
+        "master_id": m1, "service_id": s1, "weekdays": [0, 1, 2, 3, 4, 5, 6],
+        "work_start": "09:00", "work_end": "13:00", "date_from": day(3), "date_to": day(5)
+    })
+    await s.call("schedule other master", "POST", "/admin/appointments/bulk", json={
+        "master_id": m2, "service_id": s1, "weekdays": [0, 2, 4],
+        "work_start": "09:00", "work_end": "12:00", "date_from": day(1), "date_to": day(9), "price": 700
+    })
+
+    await s.call("availability", "GET", f"/clients/services/{s1}/availability", params={"date_from": day(3), "date_to": day(4)})
+    await s.call("availability master", "GET", f"/clients/services/{s2}/availability",
+                 params={"date_from": day(3), "date_to": day(3), "master_id": m1})
+    await s.call("earliest", "GET", f"/clients/services/{s1}/availability/earliest", params={"date_from": day(3), "date_to": day(9)})
+    await s.call("availability unknown service", "GET", "/clients/services/999/availability")
+
+    page = await s.call("appointments", "GET", "/clients/appointments", params={"limit": 5})
+    await s.call("appointments next page", "GET", "/clients/appointments", params={"limit": 5, "cursor": page["cursor"]})
+    await s.call("appointments free", "GET", "/clients/appointments", params={"master_id": m2, "free": "true", "date_from": day(2)})
+    await s.call("appointments stream", "GET", "/clients/appointments", params={"stream": "true", "master_id": m1})
+
+    await s.call("book", "POST", f"/clients/1/appointments/{a1}")
+    await s.call("book again", "POST", f"/clients/1/appointments/{a1}")
+    await s.call("book taken", "POST", f"/clients/2/appointments/{a1}")
+    await s.call("book unknown client", "POST", f"/clients/999/appointments/{a1 + 1}")
+    await s.call("book unknown slot", "POST", "/clients/1/appointments/99999")
+    await s.call("book second", "POST", f"/clients/1/appointments/{a1 + 3}")
+    await s.call("bookings", "GET", "/clients/1/appointments")
+    await s.call("bookings upcoming", "GET", "/clients/1/appointments", params={"scope": "upcoming"})
+    await s.call("bookings past", "GET", "/clients/1/appointments", params={"scope": "past"})
+    await s.call("bookings empty", "GET", "/clients/2/appointments")
+    await s.call("bookings unknown client", "GET", "/clients/999/appointments")
+    await s.call("bookings no client", "GET", "/clients/0/appointments")
+    await s.call("unbook other client", "POST", f"/clients/2/appointment/{a1}")
+    await s.call("unbook", "POST", f"/clients/1/appointment/{a1}")
+    await s.call("unbook again", "POST", f"/clients/1/appointment/{a1}")
+    await s.call("unbook unknown slot", "POST", "/clients/1/appointment/99999")
+
+    await s.call("master schedule", "GET", f"/clients/masters/{m1}/schedule", params={"date_from": day(3), "date_to": day(4)})
+    await s.call("master schedule unknown", "GET", "/clients/masters/999/schedule", params={"date_from": day(3), "date_to": day(4)})
+    await s.call("master services", "GET", f"/clients/masters/{m1}/services", params={"master_id": m1})
+    await s.call("master services unknown", "GET", "/clients/masters/999/services", params={"master_id": 999})
+    await s.call("master appointments", "GET", f"/clients/masters/{m2}/appointments", params={"master_id": m2})
+    await s.call("master", "GET", f"/clients/masters/{m2}")
+    await s.call("masters", "GET", "/clients/masters", params={"limit": 1})
+    await s.call("services", "GET", "/clients/services")
+    await s.call("catalog", "GET", "/clients/catalog")
+
+    await s.call("appointment id", "POST", "/clients/appointment_id", json={
+        "date": day(3), "start_time": "10:15", "finish_time": "10:20", "master_id": m1
+    })
+    await s.call("appointment id unknown", "POST", "/clients/appointment_id", json={
+        "date": day(3), "start_time": "20:15", "finish_time": "20:20", "master_id": m1
+    })
+    await s.call("service id", "POST", "/clients/service_id", json={"name": "Укладка", "description": "u", "default_price": 500})
+    await s.call("master id", "POST", "/clients/master_id", json={"phone": "70000000002"})
+    await s.call("client by tg", "GET", "/clients/by_tg_id/tg3")
+    await s.call("client by tg unknown", "GET", "/clients/by_tg_id/zzz")
+    await s.call("clients by tg", "POST", "/clients/by_tg_ids", json={"tg_ids": ["tg1", "tg4", "nope"]})
+    await s.call("client id", "POST", "/clients/client_id", params={"tg_id": "tg2"})
+    for query in ["Ан", "андр", "7999000", "Иванова", "анна иван", "xyz"]:
+        await s.call(f"search {query}", "GET", "/admin/clients/search", params={"q": query})
+    page = await s.call("clients", "GET", "/clients/", params={"limit": 2})
+    await s.call("clients next page", "GET", "/clients/", params={"limit": 2, "cursor": page["cursor"]})
+    await s.call("clients stream", "GET", "/clients/", params={"stream": "true"})
+
+    await s.call("delete", "DELETE", f"/admin/appointments/{a1}")
+    await s.call("delete again", "DELETE", f"/admin/appointments/{a1}")
+    await s.call("appointments after delete", "GET", "/clients/appointments",
+                 params={"master_id": m1, "date_from": day(3), "date_to": day(3)})
+
+
+def truncate() -> None:
+    with connect() as conn, conn.cursor() as cur:
+        cur.execute(
+            'TRUNCATE "Appointment", "Appointment_archive", "Masters_services", "Master", "Service", "Client" '
+            'RESTART IDENTITY CASCADE'
+        )
+        cur.execute(
+            """INSERT INTO "Client" (id, name, phone, tg_id) """
+            """VALUES (0, 'Нет клиента', '0000000000', '0')"""
+        )
+
+
+async def record(url: str) -> list[dict]:
+    async with aiohttp.ClientSession(url) as http:
+        session = Session(http, url)
+        await scenario(session)
+    return session.steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнить ответы API на PostgreSQL и в режиме REPOSITORY_BACKEND=memory")
+    parser.add_argument("--sql-url", default="http://127.0.0.1:8000", help="API с REPOSITORY_BACKEND=sql")
+    parser.add_argument("--memory-url", default="http://127.0.0.1:8001", help="только что запущенный API с REPOSITORY_BACKEND=memory")
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы БД перед сценарием")
+    args = parser.parse_args()
+
+    if args.truncate:
+        truncate()
+    sql_steps = asyncio.run(record(args.sql_url))
+    memory_steps = asyncio.run(record(args.memory_url))
+
+    mismatches = 0
+    for sql_step, memory_step in zip(sql_steps, memory_steps):
+        if sql_step != memory_step:
+            mismatches += 1
+            print(f"{sql_step['name']}:")
+            print(f"  sql     {json.dumps(sql_step, ensure_ascii=False, sort_keys=True)}")
+            print(f"  memory  {json.dumps(memory_step, ensure_ascii=False, sort_keys=True)}")
+    print(f"{len(sql_steps)} запросов, расхождений: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import psycopg
+from dotenv import load_dotenv
+
+DAY_START = 9 * 60
+DAY_END = 21 * 60
+DURATIONS = [30, 45, 60, 90, 120]
+FIRST_NAMES = ["Анна", "Мария", "Елена", "Ольга", "Ирина", "Наталья", "Светлана", "Дарья", "Алексей", "Иван"]
+SURNAMES = ["Иванова", "Петрова", "Смирнова", "Кузнецова", "Попова", "Соколова", "Лебедева", "Козлова"]
+
+
+def connect() -> psycopg.Connection:
+    load_dotenv()
+    return psycopg.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        sslmode=os.getenv("DB_SSLMODE", "require"),
+    )
+
+
+def copy_rows(cur: psycopg.Cursor, table: str, columns: list[str], rows) -> int:
+    count = 0
+    column_list = ", ".join(columns)
+    with cur.copy(f'COPY "{table}" ({column_list}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return count
+
+
+def reset_sequence(cur: psycopg.Cursor, table: str) -> None:
+    cur.execute(
+        f"""SELECT setval(pg_get_serial_sequence('"{table}"', 'id'), """
+        f"""(SELECT GREATEST(MAX(id), 1) FROM "{table}"))"""
+    )
+
+
+def generate_clients(count: int, rnd: random.Random):
+    for i in range(1, count + 1):
+        yield (i, rnd.choice(FIRST_NAMES), rnd.choice(SURNAMES), f"7{i:010d}", f"bench{i}")
+
+
+def generate_masters(count: int, rnd: random.Random):
+    for i in range(1, count + 1):
+        yield (i, rnd.choice(FIRST_NAMES), rnd.choice(SURNAMES), f"8{i:010d}")
+
+
+def generate_services(count: int, rnd: random.Random):
+    for i in range(1, count + 1):
+        minutes = rnd.choice(DURATIONS)
+        yield (i, f"Услуга {i}", f"{minutes // 60:02d}:{minutes % 60:02d}", f"Описание услуги {i}", rnd.randrange(500, 5000, 100))
+
+
+def generate_links(masters: int, services: int, per_master: int, rnd: random.Random):
+    links = {}
+    for master_id in range(1, masters + 1):
+        for service_id in rnd.sample(range(1, services + 1), min(per_master, services)):
+            links.setdefault(master_id, []).append(service_id)
+    return links
+
+
+def generate_appointments(
+        count: int,
+        links: dict[int, list[int]],
+        durations: dict[int, int],
+        prices: dict[int, int],
+        clients: int,
+        start: date,
+        booked_ratio: float,
+        rnd: random.Random
+):
+    if count and not any(DAY_START + durations[service_id] <= DAY_END
+                         for service_ids in links.values() for service_id in service_ids):
+        raise ValueError("No linked service fits into a working day, cannot generate appointments")
+    appointment_id = 0
+    day = start
+    while appointment_id < count:
+        for master_id, service_ids in links.items():
+            minute = DAY_START
+            while appointment_id < count:
+                service_id = rnd.choice(service_ids)
+                finish = minute + durations[service_id]
+                if finish > DAY_END:
+                    break
+                appointment_id += 1
+                client_id = rnd.randint(1, clients) if clients and rnd.random() < booked_ratio else 0
+                yield (
+                    appointment_id,
+                    day,
+                    f"{minute // 60:02d}:{minute % 60:02d}",
+                    f"{finish // 60:02d}:{finish % 60:02d}",
+                    prices[service_id],
+                    client_id,
+                    master_id,
+                    service_id,
+                )
+                minute = finish
+            if appointment_id >= count:
+                break
+        day += timedelta(days=1)
+
+
+def seed(args: argparse.Namespace) -> None:
+    rnd = random.Random(args.seed)
+    started = datetime.now()
+    with connect() as conn, conn.cursor() as cur:
+        if args.truncate:
+            cur.execute(
+                'TRUNCATE "Appointment", "Appointment_archive", "Masters_services", "Master", "Service", "Client" '
+                'RESTART IDENTITY CASCADE'
+            )
+        cur.execute(
+            """INSERT INTO "Client" (id, name, phone, tg_id) """
+            """VALUES (0, 'Нет клиента', '0000000000', '0') ON CONFLICT DO NOTHING"""
+        )
+        print("clients", copy_rows(cur, "Client", ["id", "name", "surname", "phone", "tg_id"],
+                                   generate_clients(args.clients, rnd)))
+        print("masters", copy_rows(cur, "Master", ["id", "name", "surname", "phone"],
+                                   generate_masters(args.masters, rnd)))
+        services = list(generate_services(args.services, rnd))
+        print("services", copy_rows(cur, "Service", ["id", "name", "duration", "description", "default_price"],
+                                    services))
+        durations = {row[0]: int(row[2][:2]) * 60 + int(row[2][3:]) for row in services}
+        prices = {row[0]: row[4] for row in services}
+        links = generate_links(args.masters, args.services, args.services_per_master, rnd)
+        print("links", copy_rows(cur, "Masters_services", ["master_id", "service_id"],
+                                 ((m, s) for m, ids in links.items() for s in ids)))
+        start = date.fromisoformat(args.start) if args.start else date.today() - timedelta(days=args.history_days)
+        cur.execute("SELECT appointment_create_partitions(%s, %s)", (start, date.today() + timedelta(days=366)))
+        print("appointments", copy_rows(
+            cur,
+            "Appointment",
+            ["id", "date", "start_time", "finish_time", "price", "client_id", "master_id", "service_id"],
+            generate_appointments(args.appointments, links, durations, prices, args.clients, start,
+                                  args.booked_ratio, rnd)
+        ))
+        cur.execute('SELECT appointment_create_partitions(min(date), max(date)) FROM "Appointment_default"')
+        for table in ("Client", "Master", "Service", "Appointment"):
+            reset_sequence(cur, table)
+        cur.execute("ANALYZE")
+    print("done in", datetime.now() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заполнить локальную БД данными для нагрузочных тестов")
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--masters", type=int, default=50)
+    parser.add_argument("--services", type=int, default=40)
+    parser.add_argument("--services-per-master", type=int, default=8)
+    parser.add_argument("--appointments", type=int, default=500_000)
+    parser.add_argument("--booked-ratio", type=float, default=0.7)
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--start", help="первый день расписания, YYYY-MM-DD")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы перед заполнением")
+    seed(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+Existing databases created before migrations were introduced should be
+marked with `alembic stamp 0001` instead of running this revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "Client",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(30), nullable=False),
+        sa.Column("surname", sa.String(80)),
+        sa.Column("phone", sa.String(20), nullable=False),
+        sa.Column("tg_id", sa.String(50), nullable=False),
+    )
+    op.create_index("ix_Client_tg_id", "Client", ["tg_id"], unique=True)
+
+    op.create_table(
+        "Master",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(30), nullable=False),
+        sa.Column("surname", sa.String(80), nullable=False),
+        sa.Column("phone", sa.String(20), nullable=False),
+    )
+
+    op.create_table(
+        "Service",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("duration", sa.Time(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("default_price", sa.Integer(), nullable=False),
+    )
+
+    op.create_table(
+        "Masters_services",
+        sa.Column("master_id", sa.Integer(), sa.ForeignKey("Master.id"), primary_key=True),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("Service.id"), primary_key=True),
+        sa.Column("price", sa.Integer(), nullable=True),
+    )
+
+    op.create_table(
+        "Appointment",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("finish_time", sa.Time(), nullable=False),
+        sa.Column("price", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("NOW()")),
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("Client.id"), nullable=False),
+        sa.Column("master_id", sa.Integer(), sa.ForeignKey("Master.id"), nullable=False),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("Service.id"), nullable=False),
+    )
+
+    op.create_table(
+        "Business",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("phone", sa.String(20), nullable=False),
+        sa.Column("address", sa.String(150)),
+        sa.Column("description", sa.Text()),
+        sa.Column("login", sa.String(50), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("NOW()")),
+    )
+
+    # Free slots reference the placeholder client with id 0.
+    op.execute(
+        """INSERT INTO "Client" (id, name, phone, tg_id) """
+        """VALUES (0, 'Нет клиента', '0000000000', '0') ON CONFLICT DO NOTHING"""
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("Business")
+    op.drop_table("Appointment")
+    op.drop_table("Masters_services")
+    op.drop_table("Service")
+    op.drop_table("Master")
+    op.drop_index("ix_Client_tg_id", table_name="Client")
+    op.drop_table("Client")
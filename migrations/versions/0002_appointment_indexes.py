@@ -0,0 +1,39 @@
+"""appointment indexes and no-overlap constraint
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:30:00
+
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.create_index("ix_Appointment_master_id_date", "Appointment", ["master_id", "date", "start_time"])
+    op.create_index("ix_Appointment_client_id_date", "Appointment", ["client_id", "date"])
+    op.create_index("ix_Appointment_date_id", "Appointment", ["date", "id"])
+    op.create_check_constraint(
+        "ck_Appointment_time_order",
+        "Appointment",
+        "finish_time > start_time"
+    )
+    op.execute(
+        """ALTER TABLE "Appointment" ADD CONSTRAINT "ex_Appointment_master_overlap" """
+        """EXCLUDE USING gist (master_id WITH =, date WITH =, """
+        """tsrange(date + start_time, date + finish_time) WITH &&)"""
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("ex_Appointment_master_overlap", "Appointment")
+    op.drop_constraint("ck_Appointment_time_order", "Appointment")
+    op.drop_index("ix_Appointment_date_id", table_name="Appointment")
+    op.drop_index("ix_Appointment_client_id_date", table_name="Appointment")
+    op.drop_index("ix_Appointment_master_id_date", table_name="Appointment")
@@ -0,0 +1,28 @@
+"""client search indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 21:40:00
+
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        """CREATE INDEX "ix_Client_full_name_trgm" ON "Client" """
+        """USING gin (lower(name || ' ' || coalesce(surname, '')) gin_trgm_ops)"""
+    )
+    op.execute("""CREATE INDEX "ix_Client_phone_prefix" ON "Client" (phone varchar_pattern_ops)""")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_Client_phone_prefix", table_name="Client")
+    op.drop_index("ix_Client_full_name_trgm", table_name="Client")
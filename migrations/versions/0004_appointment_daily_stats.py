@@ -0,0 +1,105 @@
+"""appointment daily stats rollup
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 22:30:00
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+CONTRIBUTION = """
+    SELECT date, master_id, service_id,
+           {sign} * (client_id <> 0)::int AS booked_count,
+           {sign} * (client_id = 0)::int AS free_count,
+           {sign} * CASE WHEN client_id <> 0 THEN price ELSE 0 END::bigint AS revenue,
+           {sign} * CASE WHEN client_id <> 0
+                         THEN (extract(epoch FROM finish_time - start_time) / 60)::int
+                         ELSE 0 END AS booked_minutes
+    FROM {rows}
+"""
+
+APPLY = """
+    INSERT INTO "Appointment_daily_stats" AS stats
+        (date, master_id, service_id, booked_count, free_count, revenue, booked_minutes)
+    SELECT date, master_id, service_id,
+           sum(booked_count), sum(free_count), sum(revenue), sum(booked_minutes)
+    FROM ({contributions}) AS delta
+    GROUP BY date, master_id, service_id
+    ORDER BY date, master_id, service_id
+    ON CONFLICT (date, master_id, service_id) DO UPDATE SET
+        booked_count = stats.booked_count + EXCLUDED.booked_count,
+        free_count = stats.free_count + EXCLUDED.free_count,
+        revenue = stats.revenue + EXCLUDED.revenue,
+        booked_minutes = stats.booked_minutes + EXCLUDED.booked_minutes
+"""
+
+TRIGGERS = {
+    "insert": ("INSERT", "REFERENCING NEW TABLE AS new_rows",
+               CONTRIBUTION.format(sign=1, rows="new_rows")),
+    "update": ("UPDATE", "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+               CONTRIBUTION.format(sign=-1, rows="old_rows") + " UNION ALL " + CONTRIBUTION.format(sign=1, rows="new_rows")),
+    "delete": ("DELETE", "REFERENCING OLD TABLE AS old_rows",
+               CONTRIBUTION.format(sign=-1, rows="old_rows")),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "Appointment_daily_stats",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("master_id", sa.Integer(), sa.ForeignKey("Master.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("Service.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("booked_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("free_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("booked_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("date", "master_id", "service_id"),
+    )
+    for event, (operation, referencing, contributions) in TRIGGERS.items():
+        op.execute(
+            f"""CREATE FUNCTION appointment_daily_stats_{event}() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                {APPLY.format(contributions=contributions)};
+                RETURN NULL;
+            END $$"""
+        )
+        op.execute(
+            f"""CREATE TRIGGER appointment_daily_stats_{event} AFTER {operation} ON "Appointment" """
+            f"""{referencing} FOR EACH STATEMENT EXECUTE FUNCTION appointment_daily_stats_{event}()"""
+        )
+    op.execute(
+        f"""CREATE FUNCTION appointment_daily_stats_rebuild(date_from date, date_to date) RETURNS bigint
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            rebuilt bigint;
+        BEGIN
+            LOCK TABLE "Appointment" IN SHARE MODE;
+            DELETE FROM "Appointment_daily_stats"
+            WHERE (date_from IS NULL OR date >= date_from) AND (date_to IS NULL OR date <= date_to);
+            INSERT INTO "Appointment_daily_stats"
+                (date, master_id, service_id, booked_count, free_count, revenue, booked_minutes)
+            SELECT date, master_id, service_id,
+                   sum(booked_count), sum(free_count), sum(revenue), sum(booked_minutes)
+            FROM ({CONTRIBUTION.format(sign=1, rows='"Appointment"')}
+                  WHERE (date_from IS NULL OR date >= date_from) AND (date_to IS NULL OR date <= date_to)) AS delta
+            GROUP BY date, master_id, service_id;
+            GET DIAGNOSTICS rebuilt = ROW_COUNT;
+            RETURN rebuilt;
+        END $$"""
+    )
+    op.execute("SELECT appointment_daily_stats_rebuild(NULL, NULL)")
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION appointment_daily_stats_rebuild(date, date)")
+    for event in TRIGGERS:
+        op.execute(f"""DROP TRIGGER appointment_daily_stats_{event} ON "Appointment" """)
+        op.execute(f"DROP FUNCTION appointment_daily_stats_{event}()")
+    op.drop_table("Appointment_daily_stats")
@@ -0,0 +1,245 @@
+"""monthly appointment partitions and archive
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+PARTITIONS_AHEAD = "3 months"
+
+COLUMNS = "id, date, start_time, finish_time, price, created_at, client_id, master_id, service_id"
+
+OVERLAP = "EXCLUDE USING gist (master_id WITH =, date WITH =, tsrange(date + start_time, date + finish_time) WITH &&)"
+
+INDEXES = {
+    "ix_{table}_master_id_date": "master_id, date, start_time",
+    "ix_{table}_client_id_date": "client_id, date",
+    "ix_{table}_date_id": "date, id",
+}
+
+STATS_TRIGGERS = {
+    "insert": ("INSERT", "REFERENCING NEW TABLE AS new_rows"),
+    "update": ("UPDATE", "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    "delete": ("DELETE", "REFERENCING OLD TABLE AS old_rows"),
+}
+
+CONTRIBUTION = """
+    SELECT date, master_id, service_id,
+           (client_id <> 0)::int AS booked_count,
+           (client_id = 0)::int AS free_count,
+           CASE WHEN client_id <> 0 THEN price ELSE 0 END::bigint AS revenue,
+           CASE WHEN client_id <> 0
+                THEN (extract(epoch FROM finish_time - start_time) / 60)::int
+                ELSE 0 END AS booked_minutes
+    FROM {rows}
+"""
+
+REBUILD = """
+    CREATE OR REPLACE FUNCTION appointment_daily_stats_rebuild(date_from date, date_to date) RETURNS bigint
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        rebuilt bigint;
+    BEGIN
+        {locks}
+        DELETE FROM "Appointment_daily_stats"
+        WHERE (date_from IS NULL OR date >= date_from) AND (date_to IS NULL OR date <= date_to);
+        INSERT INTO "Appointment_daily_stats"
+            (date, master_id, service_id, booked_count, free_count, revenue, booked_minutes)
+        SELECT date, master_id, service_id,
+               sum(booked_count), sum(free_count), sum(revenue), sum(booked_minutes)
+        FROM ({contributions}
+              WHERE (date_from IS NULL OR date >= date_from) AND (date_to IS NULL OR date <= date_to)) AS delta
+        GROUP BY date, master_id, service_id;
+        GET DIAGNOSTICS rebuilt = ROW_COUNT;
+        RETURN rebuilt;
+    END $$
+"""
+
+CREATE_PARTITIONS = f"""
+    CREATE FUNCTION appointment_create_partitions(date_from date, date_to date) RETURNS integer
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        month date;
+        partition text;
+        created integer := 0;
+    BEGIN
+        IF date_from IS NULL OR date_to IS NULL THEN
+            RETURN 0;
+        END IF;
+        PERFORM pg_advisory_xact_lock(hashtext('appointment_partitions'));
+        month := date_trunc('month', date_from)::date;
+        WHILE month <= date_to LOOP
+            partition := 'Appointment_' || to_char(month, 'YYYY_MM');
+            IF to_regclass(format('%I', partition)) IS NULL THEN
+                LOCK TABLE "Appointment_default" IN EXCLUSIVE MODE;
+                EXECUTE format('CREATE TABLE %I (LIKE "Appointment" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                               partition);
+                EXECUTE format('WITH moved AS (DELETE FROM "Appointment_default" '
+                               'WHERE date >= %L AND date < %L RETURNING {COLUMNS}) '
+                               'INSERT INTO %I ({COLUMNS}) SELECT {COLUMNS} FROM moved',
+                               month, (month + interval '1 month')::date, partition);
+                EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I {OVERLAP}',
+                               partition, 'ex_' || partition || '_master_overlap');
+                EXECUTE format('ALTER TABLE "Appointment" ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               partition, month, (month + interval '1 month')::date);
+                created := created + 1;
+            END IF;
+            month := (month + interval '1 month')::date;
+        END LOOP;
+        RETURN created;
+    END $$
+"""
+
+ARCHIVE_PARTITIONS = f"""
+    CREATE FUNCTION appointment_archive_partitions(before date) RETURNS integer
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        month date;
+        partition record;
+        archived integer := 0;
+    BEGIN
+        PERFORM pg_advisory_xact_lock(hashtext('appointment_partitions'));
+        before := date_trunc('month', before)::date;
+        FOR month IN
+            SELECT DISTINCT date_trunc('month', date)::date FROM "Appointment_default" WHERE date < before
+        LOOP
+            PERFORM appointment_create_partitions(month, month);
+        END LOOP;
+        WITH moved AS (
+            DELETE FROM "Appointment_default" WHERE date < before RETURNING {COLUMNS}
+        )
+        INSERT INTO "Appointment_archive" ({COLUMNS}) SELECT {COLUMNS} FROM moved;
+        FOR partition IN
+            SELECT c.relname, to_date(right(c.relname, 7), 'YYYY_MM') AS month
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = '"Appointment"'::regclass AND c.relname <> 'Appointment_default'
+            ORDER BY c.relname
+        LOOP
+            CONTINUE WHEN partition.month >= before;
+            EXECUTE format('ALTER TABLE "Appointment" DETACH PARTITION %I', partition.relname);
+            EXECUTE format('ALTER TABLE "Appointment_archive" ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           partition.relname, partition.month, (partition.month + interval '1 month')::date);
+            archived := archived + 1;
+        END LOOP;
+        RETURN archived;
+    END $$
+"""
+
+
+def _create_indexes(table: str) -> None:
+    for name, columns in INDEXES.items():
+        op.execute(f'CREATE INDEX "{name.format(table=table)}" ON "{table}" ({columns})')
+
+
+def _create_stats_triggers() -> None:
+    for event, (operation, referencing) in STATS_TRIGGERS.items():
+        op.execute(
+            f"""CREATE TRIGGER appointment_daily_stats_{event} AFTER {operation} ON "Appointment" """
+            f"""{referencing} FOR EACH STATEMENT EXECUTE FUNCTION appointment_daily_stats_{event}()"""
+        )
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE "Appointment" RENAME TO "Appointment_unpartitioned"')
+    op.execute('ALTER SEQUENCE "Appointment_id_seq" OWNED BY NONE')
+    op.execute('ALTER TABLE "Appointment_unpartitioned" DROP CONSTRAINT "Appointment_pkey"')
+    op.execute('ALTER TABLE "Appointment_unpartitioned" DROP CONSTRAINT "ex_Appointment_master_overlap"')
+    for name in INDEXES:
+        op.execute(f'DROP INDEX "{name.format(table="Appointment")}"')
+
+    op.execute(
+        """CREATE TABLE "Appointment" (
+            id integer NOT NULL DEFAULT nextval('"Appointment_id_seq"'::regclass),
+            date date NOT NULL,
+            start_time time NOT NULL,
+            finish_time time NOT NULL,
+            price integer NOT NULL,
+            created_at timestamp DEFAULT NOW(),
+            client_id integer NOT NULL CONSTRAINT "Appointment_client_id_fkey" REFERENCES "Client" (id),
+            master_id integer NOT NULL CONSTRAINT "Appointment_master_id_fkey" REFERENCES "Master" (id),
+            service_id integer NOT NULL CONSTRAINT "Appointment_service_id_fkey" REFERENCES "Service" (id),
+            PRIMARY KEY (id, date),
+            CONSTRAINT "ck_Appointment_time_order" CHECK (finish_time > start_time)
+        ) PARTITION BY RANGE (date)"""
+    )
+    op.execute('ALTER SEQUENCE "Appointment_id_seq" OWNED BY "Appointment".id')
+    _create_indexes("Appointment")
+    op.execute('CREATE TABLE "Appointment_default" PARTITION OF "Appointment" DEFAULT')
+    op.execute(f'ALTER TABLE "Appointment_default" ADD CONSTRAINT "ex_Appointment_default_master_overlap" {OVERLAP}')
+
+    op.execute(
+        """CREATE TABLE "Appointment_archive" (LIKE "Appointment" INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (date)"""
+    )
+    op.execute('ALTER TABLE "Appointment_archive" ADD PRIMARY KEY (id, date)')
+    _create_indexes("Appointment_archive")
+
+    op.execute(CREATE_PARTITIONS)
+    op.execute(ARCHIVE_PARTITIONS)
+    op.execute(
+        f"""SELECT appointment_create_partitions(
+            least(min(date), current_date), (current_date + interval '{PARTITIONS_AHEAD}')::date
+        ) FROM "Appointment_unpartitioned" """
+    )
+    op.execute(f'INSERT INTO "Appointment" ({COLUMNS}) SELECT {COLUMNS} FROM "Appointment_unpartitioned"')
+    op.execute('DROP TABLE "Appointment_unpartitioned"')
+    _create_stats_triggers()
+
+    op.execute(
+        """CREATE VIEW "Appointment_history" AS
+        SELECT * FROM "Appointment" UNION ALL SELECT * FROM "Appointment_archive" """
+    )
+    op.execute(REBUILD.format(
+        locks='LOCK TABLE "Appointment", "Appointment_archive" IN SHARE MODE;',
+        contributions=CONTRIBUTION.format(rows='"Appointment_history"')
+    ))
+
+
+def downgrade() -> None:
+    op.execute(REBUILD.format(
+        locks='LOCK TABLE "Appointment" IN SHARE MODE;',
+        contributions=CONTRIBUTION.format(rows='"Appointment"')
+    ))
+    op.execute('ALTER SEQUENCE "Appointment_id_seq" OWNED BY NONE')
+    op.execute(
+        """CREATE TABLE "Appointment_unpartitioned" (
+            id integer NOT NULL DEFAULT nextval('"Appointment_id_seq"'::regclass) PRIMARY KEY,
+            date date NOT NULL,
+            start_time time NOT NULL,
+            finish_time time NOT NULL,
+            price integer NOT NULL,
+            created_at timestamp DEFAULT NOW(),
+            client_id integer NOT NULL REFERENCES "Client" (id),
+            master_id integer NOT NULL REFERENCES "Master" (id),
+            service_id integer NOT NULL REFERENCES "Service" (id)
+        )"""
+    )
+    op.execute(
+        f"""INSERT INTO "Appointment_unpartitioned" ({COLUMNS})
+        SELECT {COLUMNS} FROM "Appointment_history" """
+    )
+    op.execute('DROP VIEW "Appointment_history"')
+    op.execute("DROP FUNCTION appointment_archive_partitions(date)")
+    op.execute("DROP FUNCTION appointment_create_partitions(date, date)")
+    op.execute('DROP TABLE "Appointment_archive"')
+    op.execute('DROP TABLE "Appointment"')
+    op.execute('ALTER TABLE "Appointment_unpartitioned" RENAME TO "Appointment"')
+    for constraint in ("pkey", "client_id_fkey", "master_id_fkey", "service_id_fkey"):
+        op.execute(
+            f'ALTER TABLE "Appointment" RENAME CONSTRAINT "Appointment_unpartitioned_{constraint}" '
+            f'TO "Appointment_{constraint}"'
+        )
+    op.execute('ALTER SEQUENCE "Appointment_id_seq" OWNED BY "Appointment".id')
+    _create_indexes("Appointment")
+    op.execute('ALTER TABLE "Appointment" ADD CONSTRAINT "ck_Appointment_time_order" CHECK (finish_time > start_time)')
+    op.execute(f'ALTER TABLE "Appointment" ADD CONSTRAINT "ex_Appointment_master_overlap" {OVERLAP}')
+    _create_stats_triggers()